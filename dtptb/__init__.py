@@ -1 +1 @@
-from dtptb.solvers import SWinReach
\ No newline at end of file
+from dtptb.solvers import SWinReach, solve_batch
\ No newline at end of file
@@ -0,0 +1,218 @@
+"""
+Interface to external game solvers.
+
+A reachability game is passed to an external solver as a parity game with priorities 0 and 1:
+    * States of the player with the reachability objective are owned by player 0 (even), others by player 1 (odd).
+    * Final states have a self-loop with priority 0, in place of their out-edges.
+    * All other states have priority 1. States without out-edges get a self-loop.
+
+The even player wins the parity game exactly from the states from which it can force a visit to a final state.
+Games are streamed in PGSolver text format or in a compact binary format, see `write_pgsolver` and `write_binary`.
+"""
+
+import numpy as np
+import os
+import subprocess
+import sys
+import tempfile
+
+# =============================================================================
+# GLOBALS
+# =============================================================================
+# Command that runs the bundled pure-Python stand-in of PGSolver.
+STANDIN_COMMAND = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "pgsolver_standin.py")]
+
+# Magic bytes of binary games and solutions.
+BINARY_GAME = b"PGBG"
+BINARY_SOLUTION = b"PGBS"
+
+
+# =============================================================================
+# Encoding
+# =============================================================================
+def encode(index, final, player, is_active=None):
+    """
+    Encodes a reachability game as a parity game with priorities 0 and 1 over the dense node ids of `index`.
+
+    :param index: (graphutils.GraphIndex) Index of the game graph.
+    :param final: (set) Final states.
+    :param player: (int) Player with the reachability objective.
+    :param is_active: (np.ndarray) Boolean mask of edges to include. Default: all edges.
+    :return: (tuple) `owner` (int8), `priority` (int8), `succ_ptr` (int64) and `succ` (int32) arrays.
+        Successors of node `i` are `succ[succ_ptr[i]:succ_ptr[i + 1]]`.
+    """
+    is_final = index.mask(final)
+    owner = (index.turn != player).astype(np.int8)
+    priority = (~is_final).astype(np.int8)
+
+    # Distinct successors of non-final states. Final states and dead-ends get a self-loop.
+    is_edge = ~is_final[index.src]
+    if is_active is not None:
+        is_edge &= is_active
+    pairs = np.unique(np.stack([index.src[is_edge], index.dst[is_edge]]).astype(np.int64), axis=1)
+    has_succ = np.zeros(index.num_nodes, dtype=bool)
+    has_succ[pairs[0]] = True
+    loops = np.flatnonzero(~has_succ)
+    pairs = np.concatenate([pairs, np.stack([loops, loops])], axis=1)
+    pairs = pairs[:, np.lexsort((pairs[1], pairs[0]))]
+
+    succ_ptr = np.zeros(index.num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pairs[0], minlength=index.num_nodes), out=succ_ptr[1:])
+    return owner, priority, succ_ptr, pairs[1].astype(np.int32)
+
+
+# =============================================================================
+# Game formats
+# =============================================================================
+def write_pgsolver(stream, owner, priority, succ_ptr, succ):
+    """
+    Writes a parity game in PGSolver text format, one line `<id> <priority> <owner> <succ>,...;` per node.
+
+    :param stream: Text stream to write to.
+    """
+    stream.write(f"parity {len(owner) - 1};\n")
+    succ = succ.tolist()
+    succ_ptr = succ_ptr.tolist()
+    for uid, (pri, own) in enumerate(zip(priority.tolist(), owner.tolist())):
+        stream.write(f"{uid} {pri} {own} {','.join(map(str, succ[succ_ptr[uid]:succ_ptr[uid + 1]]))};\n")
+
+
+def read_pgsolver(stream):
+    """
+    Reads a parity game in PGSolver text format. Node names and the optional `start` line are ignored.
+
+    :param stream: Text stream to read from.
+    :return: (tuple) `owner`, `priority`, `succ_ptr` and `succ` arrays as returned by `encode`.
+    """
+    nodes = dict()
+    for line in stream:
+        line = line.strip().rstrip(";")
+        if len(line) == 0 or line.startswith("parity") or line.startswith("start"):
+            continue
+        uid, pri, own, successors = line.split(maxsplit=4)[:4]
+        nodes[int(uid)] = (int(pri), int(own), [int(v) for v in successors.split(",")])
+
+    num_nodes = max(nodes) + 1 if nodes else 0
+    owner = np.zeros(num_nodes, dtype=np.int8)
+    priority = np.zeros(num_nodes, dtype=np.int64)
+    succ_ptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    succ = []
+    for uid in range(num_nodes):
+        pri, own, successors = nodes[uid]
+        priority[uid] = pri
+        owner[uid] = own
+        succ.extend(successors)
+        succ_ptr[uid + 1] = len(succ)
+    return owner, priority, succ_ptr, np.array(succ, dtype=np.int32)
+
+
+def write_binary(stream, owner, priority, succ_ptr, succ):
+    """
+    Writes a parity game in compact binary format: magic bytes, number of nodes and successors (int64),
+    followed by the `owner` (int8), `priority` (int32), `succ_ptr` (int64) and `succ` (int32) arrays, little-endian.
+
+    :param stream: Binary stream to write to.
+    """
+    stream.write(BINARY_GAME)
+    stream.write(np.array([len(owner), len(succ)], dtype="<i8").tobytes())
+    stream.write(owner.astype("<i1").tobytes())
+    stream.write(priority.astype("<i4").tobytes())
+    stream.write(succ_ptr.astype("<i8").tobytes())
+    stream.write(succ.astype("<i4").tobytes())
+
+
+def read_binary(stream):
+    """
+    Reads a parity game written by `write_binary`.
+
+    :param stream: Binary stream to read from.
+    :return: (tuple) `owner`, `priority`, `succ_ptr` and `succ` arrays as returned by `encode`.
+    """
+    assert stream.read(len(BINARY_GAME)) == BINARY_GAME, "Stream is not a binary parity game."
+    num_nodes, num_succ = np.frombuffer(stream.read(16), dtype="<i8").tolist()
+    owner = np.frombuffer(stream.read(num_nodes), dtype="<i1")
+    priority = np.frombuffer(stream.read(4 * num_nodes), dtype="<i4")
+    succ_ptr = np.frombuffer(stream.read(8 * (num_nodes + 1)), dtype="<i8")
+    succ = np.frombuffer(stream.read(4 * num_succ), dtype="<i4")
+    return owner, priority, succ_ptr, succ
+
+
+# =============================================================================
+# Solution formats
+# =============================================================================
+def write_solution(stream, winner, binary=False):
+    """
+    Writes the winner (0 or 1) of every node, in PGSolver `paritysol` text format or in binary format.
+
+    :param stream: Binary stream to write to.
+    """
+    if binary:
+        stream.write(BINARY_SOLUTION)
+        stream.write(np.array([len(winner)], dtype="<i8").tobytes())
+        stream.write(winner.astype("<i1").tobytes())
+    else:
+        stream.write(f"paritysol {len(winner) - 1};\n".encode())
+        stream.write("".join(f"{uid} {win};\n" for uid, win in enumerate(winner.tolist())).encode())
+
+
+def read_solution(data, num_nodes):
+    """
+    Parses the output of an external solver: a binary solution or PGSolver text output.
+    In text output, only the lines of the `paritysol` block of the form `<id> <winner> [<strategy>];` are read.
+
+    :param data: (bytes) Output of the solver.
+    :param num_nodes: (int) Number of nodes of the game.
+    :return: (np.ndarray) Winner (0 or 1) of every node, -1 for nodes without solution.
+    """
+    if data.startswith(BINARY_SOLUTION):
+        offset = len(BINARY_SOLUTION) + 8
+        return np.frombuffer(data[offset:offset + num_nodes], dtype="<i1").astype(np.int8)
+
+    winner = np.full(num_nodes, -1, dtype=np.int8)
+    in_solution = False
+    for line in data.decode().splitlines():
+        line = line.strip().rstrip(";")
+        if line.startswith("paritysol"):
+            in_solution = True
+            continue
+        fields = line.split()
+        if in_solution and len(fields) >= 2 and fields[0].isdigit() and fields[1] in ("0", "1"):
+            winner[int(fields[0])] = int(fields[1])
+    return winner
+
+
+# =============================================================================
+# Solver invocation
+# =============================================================================
+def solve(command, owner, priority, succ_ptr, succ, binary=False, timeout=None):
+    """
+    Runs an external parity game solver on the given game.
+
+    The game is written to a temporary file whose path is passed as the last argument of `command`.
+    The solution is read from the standard output of the solver (see `read_solution`).
+
+    :param command: (list) Executable and its arguments.
+    :param binary: (bool) If True, the game is written in binary format. Otherwise, in PGSolver text format.
+    :param timeout: (float) Seconds after which the solver is terminated. Default: None.
+    :return: (np.ndarray) Winner (0 or 1) of every node.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fpath = os.path.join(tmpdir, "game.pgb" if binary else "game.gm")
+        if binary:
+            with open(fpath, "wb") as stream:
+                write_binary(stream, owner, priority, succ_ptr, succ)
+        else:
+            with open(fpath, "w") as stream:
+                write_pgsolver(stream, owner, priority, succ_ptr, succ)
+
+        result = subprocess.run(list(command) + [fpath], capture_output=True, timeout=timeout)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"External solver `{' '.join(command)}` failed: {result.stderr.decode().strip()}")
+
+    winner = read_solution(result.stdout, len(owner))
+    if np.any(winner < 0):
+        raise RuntimeError(
+            f"External solver `{' '.join(command)}` did not report a winner for {np.count_nonzero(winner < 0)} nodes."
+        )
+    return winner
@@ -0,0 +1,86 @@
+"""
+Pure-Python stand-in for the PGSolver executable.
+
+Usage: `python pgsolver_standin.py [options] <game-file>`
+
+Reads a parity game in PGSolver text format or in the binary format of `dtptb.external`, solves it with
+Zielonka's recursive algorithm and prints the winner of every node to standard output: as a `paritysol` block
+for text input, or in binary format for binary input. Options (e.g., `-global recursive -solonly`) are accepted
+and ignored, so that the stand-in can replace PGSolver in a solver command.
+"""
+
+import numpy as np
+import os
+import sys
+
+# Import the format helpers without importing the `dtptb` package (and its solver dependencies).
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import external
+
+
+def attractor(nodes, succ, pred, owner, target, player):
+    """ Set of nodes in subgame `nodes` from which `player` can force a visit to `target`. """
+    attr = set(target)
+    counter = {uid: sum(1 for vid in succ[uid] if vid in nodes) for uid in nodes}
+    queue = list(attr)
+    for vid in queue:
+        for uid in pred[vid]:
+            if uid not in nodes or uid in attr:
+                continue
+            counter[uid] -= 1
+            if owner[uid] == player or counter[uid] == 0:
+                attr.add(uid)
+                queue.append(uid)
+    return attr
+
+
+def zielonka(nodes, succ, pred, owner, priority):
+    """ Winning regions `(W0, W1)` of the subgame induced by `nodes`. """
+    if len(nodes) == 0:
+        return set(), set()
+
+    top = max(priority[uid] for uid in nodes)
+    player = top % 2
+    attr = attractor(nodes, succ, pred, owner, {uid for uid in nodes if priority[uid] == top}, player)
+    win = zielonka(nodes - attr, succ, pred, owner, priority)
+    if len(win[1 - player]) == 0:
+        result = [set(), set()]
+        result[player] = set(nodes)
+        return tuple(result)
+
+    attr = attractor(nodes, succ, pred, owner, win[1 - player], 1 - player)
+    win = list(zielonka(nodes - attr, succ, pred, owner, priority))
+    win[1 - player] |= attr
+    return tuple(win)
+
+
+def main(args):
+    fpath = args[-1]
+    with open(fpath, "rb") as stream:
+        binary = stream.read(len(external.BINARY_GAME)) == external.BINARY_GAME
+
+    if binary:
+        with open(fpath, "rb") as stream:
+            owner, priority, succ_ptr, succ = external.read_binary(stream)
+    else:
+        with open(fpath, "r") as stream:
+            owner, priority, succ_ptr, succ = external.read_pgsolver(stream)
+
+    # Adjacency lists
+    owner, priority, succ_ptr, succ = owner.tolist(), priority.tolist(), succ_ptr.tolist(), succ.tolist()
+    successors = [succ[succ_ptr[uid]:succ_ptr[uid + 1]] for uid in range(len(owner))]
+    predecessors = [[] for _ in range(len(owner))]
+    for uid, vids in enumerate(successors):
+        for vid in vids:
+            predecessors[vid].append(uid)
+
+    # Solve and print the solution
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * len(set(priority)) + 100))
+    win0, _ = zielonka(set(range(len(owner))), successors, predecessors, owner, priority)
+    winner = np.array([0 if uid in win0 else 1 for uid in range(len(owner))], dtype=np.int8)
+    external.write_solution(sys.stdout.buffer, winner, binary=binary)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,5 +1,13 @@
+import graphutils
+import heapq
+import shutil
+import multiprocessing
 import networkx as nx
 import numpy as np
+import os
+import runutils
+import subprocess
+from dtptb import external
 from functools import reduce
 from loguru import logger
 
@@ -8,6 +16,10 @@ class SWinReach:
     DTPTB_REACH = "dtptb-reach"
     PGSOLVER = "pgsolver"
     GGSOLVER = "ggsolver"
+    DISTRIBUTED = "distributed"
+    COUNTER = "counter"
+    SPARSE = "sparse"
+    RANK_INF = np.iinfo(np.int32).max
 
     def __init__(self, graph, final, player=1, **kwargs):
         # Input parameters:
@@ -18,11 +30,80 @@ class SWinReach:
         # Solver parameters:
         self._is_solved = False
         self._solver = kwargs.get("solver", SWinReach.GGSOLVER)
+        self._n_workers = kwargs.get("n_workers", os.cpu_count())
+        self._command = kwargs.get("command", None)
+        self._binary = kwargs.get("binary", None)
+        self._budget = runutils.Budget.from_kwargs(kwargs)
+        self._owns_budget = kwargs.get("budget", None) is None
 
         # Output parameters:
-        self.level_set = {0: set(final)}
-        self.winning_nodes = {player: set(final), 3 - player: set()}
-        self.winning_edges = {player: set(), 3 - player: set()}
+        #   `rank` (int32) and `win_mask` (bool) are arrays over the dense node ids of `index`.
+        #   States that are not winning for player have rank `RANK_INF`.
+        #   `win_edge_mask` (bool) holds arrays over the edge ids of `index`.
+        #   `level_set`, `winning_nodes`, `winning_edges` and `strategy` are derived from these arrays on first access.
+        self.index = graphutils.graph_index(graph)
+        self.rank = None
+        self.win_mask = None
+        self.win_edge_mask = None
+        self._level_set = None
+        self._winning_nodes = None
+        self._winning_edges = None
+        self._strategy = None
+        self._counter = None
+        self._is_active = None
+        self._local = None
+        self.reset()
+
+    @property
+    def level_set(self):
+        """ Map of rank to the set of states with that rank. """
+        if self._level_set is None:
+            nodes = self.index.nodes
+            won = np.flatnonzero(self.rank < SWinReach.RANK_INF)
+            won = won[np.argsort(self.rank[won], kind="stable")]
+            levels, starts = np.unique(self.rank[won], return_index=True)
+            self._level_set = {0: set()}
+            for level, ids in zip(levels.tolist(), np.split(won, starts[1:])):
+                self._level_set[level] = {nodes[i] for i in ids.tolist()}
+        return self._level_set
+
+    @property
+    def winning_nodes(self):
+        """ Map of player to the set of states winning for that player. """
+        if self._winning_nodes is None:
+            self._winning_nodes = {p: self.index.nodes_of(mask) for p, mask in self.win_mask.items()}
+        return self._winning_nodes
+
+    @property
+    def winning_edges(self):
+        """ Map of player to the set of edges `(u, v, key)` winning for that player. """
+        if self._winning_edges is None:
+            edges = self.index.edges
+            self._winning_edges = {
+                p: {edges[e] for e in np.flatnonzero(mask).tolist()} for p, mask in self.win_edge_mask.items()
+            }
+        return self._winning_edges
+
+    @property
+    def strategy(self):
+        """
+        Attractor strategy of player as an int32 array over node ids.
+
+        For every winning, non-final state of player, the entry is the code (position in `index.actions`) of the action
+        of its first winning edge, which leads to a state of lower rank. For all other states, the entry is -1.
+        """
+        if self._strategy is None:
+            index = self.index
+            edges = np.flatnonzero(self.win_edge_mask[self._player] & (index.turn[index.src] == self._player))
+            sources, first = np.unique(index.src[edges], return_index=True)
+            self._strategy = np.full(index.num_nodes, -1, dtype=np.int32)
+            self._strategy[sources] = index.action_code[edges[first]]
+        return self._strategy
+
+    def action(self, state):
+        """ Action chosen by the attractor strategy at `state`, or None if player has no winning choice at `state`. """
+        code = self.strategy[self.index.node_id[state]]
+        return None if code < 0 else self.index.actions[code]
 
     def solve(self, force=False):
         # If game is solved and `force` is False, then warn the user.
@@ -30,6 +111,10 @@ class SWinReach:
             logger.warning(f"Game is solved. To solve again, call `solve(force=True)`.")
             return
 
+        # Start the deadline, unless the budget is shared with (and started by) a caller.
+        if self._owns_budget:
+            self._budget.start()
+
         # Invoke the appropriate solver by asserting appropriate model type.
         if self._solver == SWinReach.GGSOLVER:
             assert isinstance(self._graph, nx.MultiDiGraph), \
@@ -37,26 +122,107 @@ class SWinReach:
             self.solve_ggsolver()
 
         if self._solver == SWinReach.PGSOLVER:
-            assert isinstance(self._graph, [nx.MultiDiGraph, dict, np.array]), \
-                f"dtptb.SWinReach pgsolver expects model of type `nx.MultiDiGraph, dict` or `np.array`, not `{type(self._graph)}`."
+            assert isinstance(self._graph, nx.MultiDiGraph), \
+                f"dtptb.SWinReach pgsolver expects model of type `nx.MultiDiGraph`, not `{type(self._graph)}`."
             self.solve_pgsolver()
 
+        if self._solver == SWinReach.DISTRIBUTED:
+            assert isinstance(self._graph, nx.MultiDiGraph), \
+                f"dtptb.SWinReach distributed solver expects model of type `nx.MultiDiGraph`, not `{type(self._graph)}`."
+            self.solve_distributed()
+
+        if self._solver == SWinReach.COUNTER:
+            assert isinstance(self._graph, nx.MultiDiGraph), \
+                f"dtptb.SWinReach counter solver expects model of type `nx.MultiDiGraph`, not `{type(self._graph)}`."
+            self.solve_counter()
+
+        if self._solver == SWinReach.SPARSE:
+            assert isinstance(self._graph, nx.MultiDiGraph), \
+                f"dtptb.SWinReach sparse solver expects model of type `nx.MultiDiGraph`, not `{type(self._graph)}`."
+            self.solve_sparse()
+
         if self._solver == SWinReach.DTPTB_REACH:
             assert isinstance(self._graph, nx.MultiDiGraph), \
-                f"dtptb.SWinReach dtptb-reach expects model of type `nx.MultiDiGraph, dict` or `np.array`, not `{type(self._graph)}`."
+                f"dtptb.SWinReach dtptb-reach expects model of type `nx.MultiDiGraph`, not `{type(self._graph)}`."
             self.solve_dtptb_reach()
 
     def solve_dtptb_reach(self):
-        # Generate input to dtptb-reach CLI utility.
-        # Run the utility and read the output.
-        # Mark winning nodes and winning edges.
-        pass
+        """
+        Expects model to be networkx graph.
+
+        Solves the game with an external solver configured by the solver options `command` and `binary`
+        (see `solve_external`). Both must be given: the I/O format of the `dtptb-reach` utility is not implemented,
+        so the executable is not looked up on PATH. Without a configured command, the game is solved by
+        the bundled stand-in solver in the binary format of `dtptb.external`.
+        """
+        if self._command is None:
+            logger.info("No `command` configured for the dtptb-reach backend. Using the bundled stand-in solver.")
+            self.solve_external(command=external.STANDIN_COMMAND, binary=True)
+            return
+
+        if self._binary is None:
+            raise ValueError("The dtptb-reach backend requires the game format `binary` to be given with `command`.")
+        self.solve_external(command=self._command, binary=self._binary)
 
     def solve_pgsolver(self):
-        # Generate input to pgsolver CLI utility.
-        # Run the utility and read the output.
+        """
+        Expects model to be networkx graph.
+
+        Solves the game with PGSolver (`pgsolver -global recursive -solonly`). The game is passed in PGSolver
+        text format by default. See `solve_external` for options.
+        """
+        self.solve_external(command=["pgsolver", "-global", "recursive", "-solonly"], binary=False)
+
+    def solve_external(self, command, binary):
+        """
+        Solves the game with an external parity game solver (see `dtptb.external`).
+
+        The solver options `command` (list) and `binary` (bool) override the given defaults.
+        The external solver is terminated when the time budget of the solve runs out.
+        If the executable is not installed, the bundled pure-Python stand-in (`dtptb/pgsolver_standin.py`) is used.
+
+        The external solver decides the winning region. The ranks, which define the winning edges,
+        are then computed by the counter-based attractor restricted to the winning region.
+
+        :param command: (list) Default command. The path of the game file is appended to it.
+        :param binary: (bool) Default game format.
+        """
+        # Reset solver
+        self.reset()
+
+        # If no final states, do not run solver utility. Declare all states are winning for opponent.
+        if len(self._final) == 0:
+            logger.warning(f"Game has no final states. Marking all states to be winning for player-{3 - self._player}.")
+            self._mark_solved(self.rank)
+            return
+
+        # Resolve the solver command.
+        command = list(self._command) if self._command is not None else command
+        binary = self._binary if self._binary is not None else binary
+        if self._command is None and shutil.which(command[0]) is None:
+            logger.warning(f"`{command[0]}` is not installed. Using the bundled stand-in solver.")
+            command = external.STANDIN_COMMAND
+
+        # Run the utility and read the output. Even player of the parity game is the player.
+        self._budget.check()
+        try:
+            winner = external.solve(
+                command,
+                *external.encode(self.index, self._final, self._player),
+                binary=binary,
+                timeout=self._budget.remaining()
+            )
+        except subprocess.TimeoutExpired:
+            raise runutils.SolveCancelled(f"External solver `{' '.join(command)}` exceeded the time budget.")
+
         # Mark winning nodes and winning edges.
-        pass
+        rank = self._counter_rank(winner == 0)
+        if np.any((winner == 0) & (rank == SWinReach.RANK_INF)):
+            logger.warning(
+                f"External solver reported {np.count_nonzero((winner == 0) & (rank == SWinReach.RANK_INF))} winning "
+                f"states for player-{self._player} that are not attracted to final states. Marking them as losing."
+            )
+        self._mark_solved(rank)
 
     def solve_ggsolver(self):
         """
@@ -68,9 +234,7 @@ class SWinReach:
         # If no final states, do not run solver utility. Declare all states are winning for opponent.
         if len(self._final) == 0:
             logger.warning(f"Game has no final states. Marking all states to be winning for player-{3 - self._player}.")
-            self.winning_nodes[3 - self._player] = self._graph.nodes()
-            self.winning_edges[3 - self._player] = self._graph.edges()
-            self._is_solved = True
+            self._mark_solved(self.rank)
             return
 
         # Mark all final states as sink states
@@ -80,39 +244,640 @@ class SWinReach:
             filter_edge=lambda u, v, a: u not in self._final
         )
 
+        # Opponent states with a successor that cannot reach the final states are never attracted.
+        # The SCC index of the base graph answers this without re-traversing the graph on every solve.
+        index = self.index
+        coreachable = index.scc.coreachable(index.mask(self._final))
+        is_blocked = np.zeros(index.num_nodes, dtype=bool)
+        is_blocked[index.src[~coreachable[index.dst]]] = True
+        blocked = index.nodes_of(is_blocked)
+
         # Initialization
         rank = 1
         win_nodes = set(self._final)
+        ranks = self.rank.copy()
 
         while True:
             predecessors = set(reduce(set.union, map(set, map(graph.predecessors, win_nodes))))
             pre_p = {uid for uid in predecessors if graph.nodes[uid]["turn"] == self._player}
-            pre_np = predecessors - pre_p
+            pre_np = predecessors - pre_p - blocked
             pre_np = {uid for uid in pre_np if set(graph.successors(uid)).issubset(win_nodes)}
             next_level = set.union(pre_p, pre_np) - win_nodes
 
             if len(next_level) == 0:
                 break
 
-            self.level_set[rank] = next_level
-            self.winning_edges[self._player].update(
-                {(u, v, a) for u in next_level for _, v, a in graph.out_edges(u, keys=True) if v in win_nodes}
-            )
+            ranks[index.ids(next_level)] = rank
             win_nodes |= next_level
+            self._budget.step(rank, len(next_level))
             rank += 1
 
-        # States not in win_nodes are winning for np.
-        self.winning_nodes[self._player] = win_nodes
-        self.winning_nodes[3 - self._player] = set(graph.nodes()) - self.winning_nodes[self._player]
-        self.winning_edges[3 - self._player] = set(graph.edges(keys=True)) - self.winning_edges[self._player]
+        # States not in win_nodes are winning for np. Mark the game to be solved.
+        self._mark_solved(ranks)
 
-        # Mark the game to be solved
-        self._is_solved = True
+    def solve_counter(self):
+        """
+        Expects model to be networkx graph.
+
+        Computes the same level sets as `solve_ggsolver` in O(V + E) time.
+        Every opponent state keeps a counter of its successors (one per edge) that are not yet winning.
+        States are processed in breadth-first order from the final states, so each in-edge is visited exactly once
+        and a state is assigned its rank when it is won: via any edge for player, via the last edge for opponent.
+        """
+        # Reset solver
+        self.reset()
+
+        # If no final states, do not run solver utility. Declare all states are winning for opponent.
+        if len(self._final) == 0:
+            logger.warning(f"Game has no final states. Marking all states to be winning for player-{3 - self._player}.")
+            self._mark_solved(self.rank)
+            return
+
+        # States without rank are winning for np. Mark the game to be solved.
+        self._mark_solved(self._counter_rank())
+
+    def _counter_rank(self, region=None):
+        """
+        Rank array of the counter-based attractor (see `solve_counter`).
+
+        :param region: (np.ndarray) If given, boolean mask of states that may be attracted. Other states are skipped.
+        """
+        # Dense representation of the game. Python lists are faster than numpy arrays for scalar access.
+        index = self.index
+        is_player = (index.turn == self._player).tolist()
+        counter = index.out_deg.tolist()
+        in_ptr = index.in_ptr.tolist()
+        in_src = index.src[index.in_edges].tolist()
+        rank = self.rank.tolist()
+        inf = SWinReach.RANK_INF
+        if region is not None:
+            rank = np.where(region | (self.rank == 0), self.rank, -1).tolist()
+
+        # Breadth-first attractor. `queue` grows while it is traversed; final states are never re-ranked.
+        #   States leave the queue in the order of their rank. When the first state of a level leaves the queue,
+        #   the remaining queue holds exactly the states of that level.
+        queue = np.flatnonzero(index.mask(self._final)).tolist()
+        level = 0
+        for pos, u in enumerate(queue):
+            if rank[u] != level:
+                level = rank[u]
+                self._budget.step(level, len(queue) - pos)
+            next_rank = rank[u] + 1
+            for uid in in_src[in_ptr[u]:in_ptr[u + 1]]:
+                if rank[uid] != inf:
+                    continue
+                counter[uid] -= 1
+                if is_player[uid] or counter[uid] == 0:
+                    rank[uid] = next_rank
+                    queue.append(uid)
+
+        rank = np.array(rank, dtype=np.int32)
+        rank[rank == -1] = inf
+        return rank
+
+    def solve_sparse(self):
+        """
+        Expects model to be networkx graph.
+
+        Computes the same level sets as `solve_ggsolver` with one sparse matrix-vector product per level.
+        The product of the adjacency matrix with the indicator vector of the last level counts,
+        for every state, its edges into the last level. A player state is won by any such edge,
+        an opponent state when the edges counted over all levels cover its out-degree.
+        """
+        # Reset solver
+        self.reset()
+
+        # If no final states, do not run solver utility. Declare all states are winning for opponent.
+        if len(self._final) == 0:
+            logger.warning(f"Game has no final states. Marking all states to be winning for player-{3 - self._player}.")
+            self._mark_solved(self.rank)
+            return
+
+        # Out-edges of final states need not be removed: final states are won and never re-ranked.
+        index = self.index
+        adjacency = index.adjacency
+        is_player = index.turn == self._player
+        counter = index.out_deg.copy()
+        is_won = index.mask(self._final)
+        rank = self.rank.copy()
+
+        # Level-synchronous attractor over boolean frontier vectors.
+        level = 1
+        frontier = is_won.astype(np.int32)
+        while True:
+            hits = adjacency @ frontier
+            counter -= hits
+            new = (hits > 0) & ~is_won & (is_player | (counter == 0))
+
+            if not new.any():
+                break
+
+            rank[new] = level
+            is_won |= new
+            frontier = new.astype(np.int32)
+            self._budget.step(level, int(np.count_nonzero(new)))
+            level += 1
+
+        # States without rank are winning for np. Mark the game to be solved.
+        self._mark_solved(rank)
+
+    def solve_distributed(self):
+        """
+        Expects model to be networkx graph.
+
+        Computes the same level sets as `solve_ggsolver` using `n_workers` processes.
+        The nodes are partitioned into blocks of consecutive node ids with roughly equal number of out-edges.
+        Each worker owns the counters of its block and runs its part of every level of the attractor.
+        In every round, the master sends each worker only those frontier nodes that have a predecessor in its block.
+        """
+        # Reset solver
+        self.reset()
+
+        # If no final states, do not run solver utility. Declare all states are winning for opponent.
+        if len(self._final) == 0:
+            logger.warning(f"Game has no final states. Marking all states to be winning for player-{3 - self._player}.")
+            self._mark_solved(self.rank)
+            return
+
+        # Dense representation of the game. Out-edges of final states are ignored (final states are sinks).
+        index = self.index
+        is_final = index.mask(self._final)
+        is_player = index.turn == self._player
+        is_edge = ~is_final[index.src]
+
+        # Partition nodes into blocks with roughly equal number of out-edges.
+        n_workers = max(1, min(self._n_workers, index.num_nodes))
+        cuts = np.searchsorted(index.out_ptr, np.linspace(0, index.num_edges, n_workers + 1)[1:-1])
+        bounds = np.unique(np.concatenate([[0], np.minimum(cuts, index.num_nodes), [index.num_nodes]]))
+
+        # Start workers.
+        context = multiprocessing.get_context()
+        workers = []
+        for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            edges = np.arange(index.out_ptr[lo], index.out_ptr[hi])
+            edges = edges[is_edge[edges]]
+            edges = edges[np.argsort(index.dst[edges], kind="stable")]
+            needs = np.zeros(index.num_nodes, dtype=bool)
+            needs[index.dst[edges]] = True
+
+            conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_attractor_worker,
+                args=(
+                    child_conn,
+                    is_player[lo:hi],
+                    index.out_deg[lo:hi].copy(),
+                    is_final[lo:hi].copy(),
+                    index.dst[edges],
+                    index.src[edges] - lo,
+                    lo
+                ),
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            workers.append((process, conn, needs))
+
+        # Level-synchronous attractor.
+        rank = self.rank.copy()
+        level = 1
+        frontier = np.flatnonzero(is_final)
+        try:
+            while True:
+                for _, conn, needs in workers:
+                    conn.send(frontier[needs[frontier]])
+                frontier = np.concatenate([conn.recv() for _, conn, _ in workers])
+
+                if len(frontier) == 0:
+                    break
+
+                rank[frontier] = level
+                self._budget.step(level, len(frontier))
+                level += 1
+        finally:
+            # Stop workers. A worker that died has closed its end of the pipe, so it cannot be sent the stop signal.
+            # Errors are not raised here, so that the exception that ended the loop (if any) is not hidden.
+            for process, conn, _ in workers:
+                try:
+                    conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                conn.close()
+
+            # Workers exit on the stop signal. Terminate those that do not.
+            for process, _, _ in workers:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+
+        # States without rank are winning for np. Mark the game to be solved.
+        self._mark_solved(rank)
+
+    def is_winning(self, state, player):
+        """
+        Decides whether `state` is winning for `player` without solving the whole game.
+
+        If the game is solved, the answer is read from the solution. Otherwise, the states forward reachable from
+        `state` are explored, stopping at final states and at states decided by earlier queries.
+        The attractor is then computed backward within the explored states only, whose winner is fully determined
+        by the explored part. The winners of all explored states are memoized for later queries.
+
+        :param state: A state of the game graph.
+        :param player: (int) Player 1 or 2.
+        :return: (bool) True if `state` is winning for `player`.
+        """
+        index = self.index
+        uid = index.node_id[state]
+        if self._is_solved:
+            return bool(self.win_mask[player][uid])
+
+        # Memo of local queries: 1 if state is winning for player, 0 if it is not, -1 if it is not decided.
+        if self._local is None:
+            self._local = np.where(index.mask(self._final), 1, -1).astype(np.int8)
+        local = self._local
+
+        if local[uid] == -1:
+            # Forward exploration of undecided states.
+            explored = {uid}
+            stack = [uid]
+            won = []
+            while stack:
+                vid = stack.pop()
+                for wid in index.dst[index.out_ptr[vid]:index.out_ptr[vid + 1]].tolist():
+                    if local[wid] == 1:
+                        won.append(wid)
+                    elif local[wid] == -1 and wid not in explored:
+                        explored.add(wid)
+                        stack.append(wid)
+
+            # Backward attractor within explored states, seeded by their decided winning successors.
+            is_player = index.turn == self._player
+            counter = {vid: int(index.out_deg[vid]) for vid in explored}
+            queue = list(set(won))
+            for vid in queue:
+                for pid in index.src[index.in_edges[index.in_ptr[vid]:index.in_ptr[vid + 1]]].tolist():
+                    if pid not in explored or local[pid] == 1:
+                        continue
+                    counter[pid] -= 1
+                    if is_player[pid] or counter[pid] == 0:
+                        local[pid] = 1
+                        queue.append(pid)
+
+            # Explored states that are not attracted are not winning for player.
+            explored = np.fromiter(explored, dtype=np.int64, count=len(explored))
+            local[explored[local[explored] == -1]] = 0
+
+        return bool(local[uid] == 1) == (player == self._player)
+
+    def add_targets(self, nodes):
+        """
+        Adds `nodes` to the final states of a solved game and repairs the solution incrementally.
+
+        Adding final states only decreases ranks. States whose rank changes are processed in increasing order of
+        their new rank, as in Dijkstra's algorithm, so the work is proportional to the edges incident to them.
+        Opponent states keep counters of their successors that are not winning, and re-evaluate their rank
+        only when the last successor is won or when the successor that determined their rank improves.
+
+        :param nodes: (iterable) States to add to the final states.
+        """
+        nodes = set(nodes) - self._final
+
+        # If game is not solved, the new final states are picked up by the next solve.
+        if not self._is_solved:
+            self._final |= nodes
+            self.reset()
+            return
+
+        if len(nodes) == 0:
+            return
+
+        # New final states are sinks with rank 0. Final states are exactly the states with rank 0.
+        index = self.index
+        rank = self.rank
+        counter = self._counters()
+        self._final |= nodes
+        before = dict()
+        queue = []
+        for uid in index.ids(nodes).tolist():
+            before[uid] = int(rank[uid])
+            rank[uid] = 0
+            queue.append((0, uid))
+
+        # Propagate rank decreases to predecessors.
+        self._propagate(queue, before, counter)
+        self._update_solution(before.keys(), np.zeros(0, dtype=np.int64))
+
+    def make_absorbing(self, nodes):
+        """
+        Makes `nodes` absorbing in a solved game, i.e., replaces their out-edges with a self-loop,
+        and repairs the solution incrementally (see `remove_edges`).
+
+        An absorbing state that is not final is never attracted, the same as a state without out-edges.
+        Hence, the self-loop is implicit: the out-edges are removed from the solution and no edge is added.
+
+        :param nodes: (iterable) States to make absorbing.
+        """
+        index = self.index
+        ids = index.ids(nodes)
+        self._remove_edges(graphutils.ranges(index.out_ptr[ids], index.out_ptr[ids + 1]))
+
+    def remove_edges(self, edges):
+        """
+        Removes `edges` from a solved game and repairs the solution incrementally.
+
+        The graph is not modified. Removed edges are excluded from the solution until the next `solve(force=True)`,
+        which solves the game on the graph again.
+
+        Removing an edge may increase the rank of its source (lost support) and of the states whose ranks depend on it,
+        but may also let an opponent state be won (its last non-winning successor is removed).
+        The ranks of the states that may depend on a removed edge are recomputed from their unaffected successors,
+        and the rank changes are then propagated as in `add_targets`.
+
+        :param edges: (iterable) Edges `(u, v, key)` of the game graph.
+        """
+        index = self.index
+        edge_ids = []
+        for u, v, key in edges:
+            uid = index.node_id[u]
+            edge_ids.extend(
+                e for e in range(index.out_ptr[uid], index.out_ptr[uid + 1]) if index.edges[e] == (u, v, key)
+            )
+        self._remove_edges(np.array(edge_ids, dtype=np.int64))
+
+    def _remove_edges(self, edges):
+        """ Removes the edges with given ids from the solution. See `remove_edges`. """
+        # Removals are applied to a solved game.
+        if not self._is_solved:
+            self.solve()
+
+        index = self.index
+        rank = self.rank
+        counter = self._counters()
+        if self._is_active is None:
+            self._is_active = np.ones(index.num_edges, dtype=bool)
+        is_active = self._is_active
+        edges = edges[is_active[edges]]
+        if len(edges) == 0:
+            return
+
+        # A removed edge into a non-winning state no longer blocks its source.
+        is_active[edges] = False
+        np.subtract.at(counter, index.src[edges][rank[index.dst[edges]] == SWinReach.RANK_INF], 1)
+
+        # States whose rank may depend on a removed edge: the sources of removed edges and,
+        # transitively, the winning predecessors of such states with a higher rank.
+        stack = [uid for uid in np.unique(index.src[edges]).tolist() if rank[uid] != 0]
+        dirty = set(stack)
+        while stack:
+            vid = stack.pop()
+            for e in index.in_edges[index.in_ptr[vid]:index.in_ptr[vid + 1]].tolist():
+                uid = int(index.src[e])
+                if is_active[e] and uid not in dirty and rank[vid] < rank[uid] < SWinReach.RANK_INF:
+                    dirty.add(uid)
+                    stack.append(uid)
+
+        # Clear the ranks of dirty states. Their winning predecessors count them as not winning again.
+        for vid in dirty:
+            if rank[vid] == SWinReach.RANK_INF:
+                continue
+            for e in index.in_edges[index.in_ptr[vid]:index.in_ptr[vid + 1]].tolist():
+                if is_active[e]:
+                    counter[index.src[e]] += 1
+            rank[vid] = SWinReach.RANK_INF
+
+        # Recompute ranks of dirty states from their successors, which are either unaffected or recomputed.
+        is_player = index.turn == self._player
+        before = dict.fromkeys(dirty, SWinReach.RANK_INF)
+        queue = []
+        for uid in dirty:
+            out = np.arange(index.out_ptr[uid], index.out_ptr[uid + 1])
+            succ_rank = rank[index.dst[out[is_active[out]]]]
+            if len(succ_rank) == 0:
+                continue
+            if is_player[uid] and succ_rank.min() < SWinReach.RANK_INF:
+                rank[uid] = succ_rank.min() + 1
+            elif not is_player[uid] and succ_rank.max() < SWinReach.RANK_INF:
+                rank[uid] = succ_rank.max() + 1
+            else:
+                continue
+            queue.append((int(rank[uid]), uid))
+        heapq.heapify(queue)
+
+        # Propagate rank decreases to predecessors.
+        self._propagate(queue, before, counter)
+        self._update_solution(before.keys(), edges)
+
+    def _counters(self):
+        """ Number of active out-edges of each state into states that are not winning. Computed on first use. """
+        if self._counter is None:
+            index = self.index
+            is_active = np.ones(index.num_edges, dtype=bool) if self._is_active is None else self._is_active
+            is_win = self.rank < SWinReach.RANK_INF
+            self._counter = (
+                np.bincount(index.src[is_active], minlength=index.num_nodes)
+                - np.bincount(index.src[is_active & is_win[index.dst]], minlength=index.num_nodes)
+            )
+        return self._counter
+
+    def _propagate(self, queue, before, counter):
+        """
+        Propagates rank decreases from the states in `queue` (heap of `(rank, uid)`) to their predecessors.
+
+        :param before: (dict) Rank of every changed state before the update, or `RANK_INF` if the state is not
+            counted as winning by `counter`. States that change are added to it.
+        """
+        index = self.index
+        rank = self.rank
+        is_player = index.turn == self._player
+        is_active = self._is_active
+
+        while queue:
+            level, vid = heapq.heappop(queue)
+            if level != rank[vid]:
+                continue
+
+            for e in index.in_edges[index.in_ptr[vid]:index.in_ptr[vid + 1]].tolist():
+                uid = int(index.src[e])
+                if rank[uid] == 0 or (is_active is not None and not is_active[e]):
+                    continue
+
+                if is_player[uid]:
+                    new_rank = level + 1
+                else:
+                    if before[vid] == SWinReach.RANK_INF:
+                        counter[uid] -= 1
+                    if counter[uid] > 0 or before[vid] + 1 < rank[uid]:
+                        continue
+                    out = np.arange(index.out_ptr[uid], index.out_ptr[uid + 1])
+                    if is_active is not None:
+                        out = out[is_active[out]]
+                    new_rank = 1 + int(rank[index.dst[out]].max())
+
+                if new_rank < rank[uid]:
+                    before.setdefault(uid, int(rank[uid]))
+                    rank[uid] = new_rank
+                    heapq.heappush(queue, (new_rank, uid))
+
+    def _update_solution(self, changed, removed):
+        """
+        Updates winning masks of `changed` states and the classification of edges incident to them.
+        `removed` edges are dropped from the winning edges.
+        """
+        index = self.index
+        rank = self.rank
+        changed = np.fromiter(changed, dtype=np.int64)
+        is_win = rank[changed] < SWinReach.RANK_INF
+        self.win_mask[self._player][changed] = is_win
+        self.win_mask[3 - self._player][changed] = ~is_win
+
+        self.win_edge_mask[self._player][removed] = False
+        self.win_edge_mask[3 - self._player][removed] = False
+
+        edges = np.unique(np.concatenate([
+            graphutils.ranges(index.out_ptr[changed], index.out_ptr[changed + 1]),
+            index.in_edges[graphutils.ranges(index.in_ptr[changed], index.in_ptr[changed + 1])]
+        ]))
+        if self._is_active is not None:
+            edges = edges[self._is_active[edges]]
+        src, dst = index.src[edges], index.dst[edges]
+        is_edge = rank[src] != 0
+        is_win_edge = is_edge & (rank[src] < SWinReach.RANK_INF) & (rank[dst] < rank[src])
+        self.win_edge_mask[self._player][edges] = is_win_edge
+        self.win_edge_mask[3 - self._player][edges] = is_edge & ~is_win_edge
+
+        self._level_set = None
+        self._winning_nodes = None
+        self._winning_edges = None
+        self._strategy = None
 
     def reset(self):
-        self.level_set = {0: set(self._final)}
-        self.winning_nodes = {self._player: set(self._final), 3 - self._player: set()}
-        self.winning_edges = {self._player: set(), 3 - self._player: set()}
+        # The solution is cleared, so the game is unsolved until a solver marks it solved again.
+        # A cancelled solve thus leaves the game unsolved rather than with a partial solution.
+        self._is_solved = False
+        is_final = self.index.mask(self._final)
+        self.rank = np.where(is_final, 0, SWinReach.RANK_INF).astype(np.int32)
+        self.win_mask = {self._player: is_final, 3 - self._player: np.zeros(self.index.num_nodes, dtype=bool)}
+        self.win_edge_mask = {p: np.zeros(self.index.num_edges, dtype=bool) for p in (self._player, 3 - self._player)}
+        self._level_set = None
+        self._winning_nodes = None
+        self._winning_edges = None
+        self._strategy = None
+        self._counter = None
+        self._is_active = None
+        self._local = None
+
+    def _mark_solved(self, rank):
+        """
+        Stores the rank array computed by a solver and derives the winning node and edge masks from it.
+        Winning edges of player lead from a winning state to a state of lower rank. Out-edges of final states are ignored.
+        """
+        index = self.index
+        is_win = rank < SWinReach.RANK_INF
+        is_edge = ~index.mask(self._final)[index.src]
+        is_win_edge = is_edge & is_win[index.src] & (rank[index.dst] < rank[index.src])
+
+        self.rank = rank
+        self.win_mask = {self._player: is_win, 3 - self._player: ~is_win}
+        self.win_edge_mask = {self._player: is_win_edge, 3 - self._player: is_edge & ~is_win_edge}
+        self._level_set = None
+        self._winning_nodes = None
+        self._winning_edges = None
+        self._strategy = None
+        self._counter = None
+        self._is_solved = True
 
     def final(self):
         return self._final
+
+
+def solve_batch(graph, finals, player=1, **kwargs):
+    """
+    Solves the reachability game on `graph` for several sets of final states in one sweep.
+
+    The sets are packed as bit-lanes of uint64 words, one row of words per node. Every level of the attractor
+    is computed for all lanes at once: the winning words of successors are OR-ed (player states) or
+    AND-ed (opponent states) over the out-edges of each node. The levels, and hence the ranks, are the same
+    as those computed by `SWinReach.solve_ggsolver` for each set separately.
+
+    :param graph: (nx.MultiDiGraph) Game graph.
+    :param finals: (list) List of K sets of final states.
+    :param player: (int) Player with the reachability objective.
+    :param kwargs: `timeout`, `cancel`, `progress` or `budget` (see `runutils`). Progress reports the number of
+        new (state, set) pairs of every level.
+    :return: (list) K solved `SWinReach` instances, in the order of `finals`.
+    """
+    budget = runutils.Budget.from_kwargs(kwargs)
+    index = graphutils.graph_index(graph)
+    finals = [set(final) for final in finals]
+    n_lanes = len(finals)
+    n_words = (n_lanes + 63) // 64
+
+    # Level 0: final states of every lane.
+    won = np.zeros((index.num_nodes, n_words), dtype=np.uint64)
+    rank = np.full((n_lanes, index.num_nodes), SWinReach.RANK_INF, dtype=np.int32)
+    for lane, final in enumerate(finals):
+        ids = index.ids(final)
+        won[ids, lane // 64] |= np.uint64(1) << np.uint64(lane % 64)
+        rank[lane, ids] = 0
+
+    # States without out-edges are never attracted. Out-edges of others are contiguous segments of `dst`.
+    owners = np.flatnonzero(index.out_deg > 0)
+    starts = index.out_ptr[owners]
+    is_player = (index.turn[owners] == player)[:, np.newaxis]
+
+    level = 1
+    while len(owners) > 0:
+        succ = won[index.dst]
+        new = np.where(
+            is_player,
+            np.bitwise_or.reduceat(succ, starts, axis=0),
+            np.bitwise_and.reduceat(succ, starts, axis=0)
+        ) & ~won[owners]
+        is_new = new.any(axis=1)
+
+        if not is_new.any():
+            break
+
+        # Record the rank of every new (state, lane) pair. Bit `b` of word `w` is lane `64 * w + b`.
+        ids = owners[is_new]
+        new = new[is_new]
+        won[ids] |= new
+        lanes = np.unpackbits(new.astype("<u8").view(np.uint8), axis=1, bitorder="little")[:, :n_lanes]
+        pos, lane = np.nonzero(lanes)
+        rank[lane, ids[pos]] = level
+        budget.step(level, len(pos))
+        level += 1
+
+    # Wrap each lane as a solved game.
+    solutions = []
+    for lane, final in enumerate(finals):
+        solution = SWinReach(graph, final, player=player)
+        solution._mark_solved(rank[lane])
+        solutions.append(solution)
+    return solutions
+
+
+def _attractor_worker(conn, is_player, counter, is_won, dst, src, offset):
+    """
+    Worker process of `SWinReach.solve_distributed`.
+
+    The worker owns a block of consecutive node ids starting at `offset`.
+    `(src[i], dst[i])` are the out-edges of owned nodes sorted by `dst`. `src` is local to the block, `dst` is global.
+    `counter` holds the number of successors of each owned node that are not yet winning.
+    """
+    while True:
+        frontier = conn.recv()
+        if frontier is None:
+            break
+
+        # Owned predecessors of frontier, one per edge.
+        pred = src[graphutils.ranges(np.searchsorted(dst, frontier, "left"), np.searchsorted(dst, frontier, "right"))]
+        pred = pred[~is_won[pred]]
+
+        # Player states are won by any edge into frontier. Opponent states are won when all successors are won.
+        np.subtract.at(counter, pred, 1)
+        pred = np.unique(pred)
+        new = pred[is_player[pred] | (counter[pred] == 0)]
+        is_won[new] = True
+        conn.send(new + offset)
@@ -1,5 +1,4 @@
 import ast
-import copy
 import functools
 import itertools
 
@@ -216,12 +215,10 @@ class TJDecoyAllocExplorer(QMainWindow):
 
         # Call appropriate solver.
         if perspective_of.upper() == "TOM":
-            p1_game = copy.deepcopy(self._game)
-            for uid, data in p1_game.nodes(data=True):
-                if data['state'][2:4] in traps or data['state'][2:4] in fakes:
-                    p1_game.remove_edges_from(list(p1_game.out_edges(uid, keys=True)))
-            final = {uid for uid, u in p1_game.nodes(data=True) if u['state'][2:4] in self._real_cheese}
-            solution = solvers.solve_base_game(p1_game, final)
+            final = {uid for uid, u in self._game.nodes(data=True) if u['state'][2:4] in self._real_cheese}
+            decoys = {uid for uid, u in self._game.nodes(data=True) if u['state'][2:4] in traps or u['state'][2:4] in fakes}
+            solution = solvers.solve_base_game(self._game, final)
+            solution.make_absorbing(decoys)
 
         elif perspective_of.upper() == "JERRY":
             final = {uid for uid, u in self._game.nodes(data=True) if u['state'][2:4] in self._real_cheese}
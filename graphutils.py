@@ -0,0 +1,506 @@
+"""
+Array-backed structural indices over game graphs.
+
+An index is computed once per graph and cached in `graph.graph`, so that repeated solves on the same base game graph
+(e.g., during decoy allocation) share the preprocessing.
+
+The cache only detects edits that change the number of nodes or edges. Code that modifies an indexed graph in-place
+(e.g., rewires an edge or changes the turn of a state) must call `invalidate_index(graph)` afterwards.
+Frozen graphs (`nx.freeze`) cannot be modified and are never cached.
+"""
+
+import game
+import networkx as nx
+import numpy as np
+import scipy.sparse
+from loguru import logger
+
+# =============================================================================
+# GLOBALS
+# =============================================================================
+# Key under which the index is cached in `graph.graph`.
+INDEX_KEY = "__index__"
+
+
+# =============================================================================
+# Index classes
+# =============================================================================
+class GraphIndex:
+    def __init__(self, graph):
+        """
+        Dense, array-based view of a `nx.MultiDiGraph`.
+
+        Nodes are assigned ids `0, ..., n-1` in the order of `graph.nodes()`.
+        Edges are assigned ids `0, ..., m-1` in the order of `graph.edges(keys=True)`, which groups edges by their source.
+
+        :param graph: (nx.MultiDiGraph) Game graph.
+
+        :note: The index is a snapshot. If the graph is modified in-place, call `invalidate_index(graph)`.
+        """
+        # Bookkeeping to detect stale indices.
+        self._owner = id(graph)
+
+        # Nodes and edges, sorted by source.
+        self._build(
+            nodes=list(graph.nodes()),
+            turn=[turn for _, turn in graph.nodes(data="turn", default=0)],
+            edges=list(graph.edges(keys=True))
+        )
+
+    @classmethod
+    def from_model(cls, model):
+        """
+        Index of a model dictionary returned by `game.Game.build_model`, built without constructing a graph.
+
+        Nodes and edges are the same as those of `game.to_graph(model)`: states are identified by their ids,
+        and every transition `u --a--> v` is an edge `(u, v, a)`. Deterministic `{a: v}`, non-deterministic
+        `{a: {v}}` and probabilistic `{a: {v: p}}` transitions are supported. For the latter, the probability
+        of every edge is stored in `probability`.
+
+        :param model: (dict) Model representing a game on graph.
+        :return: (GraphIndex) Index of the model.
+        """
+        transitions = model["transitions"]
+        type_transitions = model["type_transitions"]
+        nodes = list(model["states"])
+        edges = []
+        probability = []
+        for u in nodes:
+            for a, succ in transitions.get(u, dict()).items():
+                if type_transitions == game.TRANS_DETERMINISTIC:
+                    edges.append((u, succ, a))
+                elif type_transitions == game.TRANS_NON_DETERMINISTIC:
+                    edges.extend((u, v, a) for v in succ)
+                elif type_transitions == game.TRANS_PROBABILISTIC:
+                    edges.extend((u, v, a) for v in succ)
+                    probability.extend(succ.values())
+                else:
+                    raise ValueError(f"Invalid type of transition function: {type_transitions}")
+
+        turn = model.get("turn", dict())
+        index = cls.__new__(cls)
+        index._owner = id(model)
+        index._build(nodes=nodes, turn=[turn.get(u, 0) for u in nodes], edges=edges)
+        if type_transitions == game.TRANS_PROBABILISTIC:
+            index.probability = np.asarray(probability, dtype=np.float64)
+        return index
+
+    def _build(self, nodes, turn, edges):
+        """ Builds the arrays of the index from the list of nodes, their turns and the list of edges sorted by source. """
+        self.num_nodes = len(nodes)
+        self.num_edges = len(edges)
+
+        # Nodes
+        self.nodes = nodes
+        self.node_id = {u: idx for idx, u in enumerate(self.nodes)}
+        self.turn = np.fromiter(turn, dtype=np.int8, count=self.num_nodes)
+
+        # Edges, sorted by source. `probability` holds the transition probabilities of models indexed by `from_model`.
+        self.edges = edges
+        self.keys = [a for _, _, a in self.edges]
+        self.src = np.fromiter((self.node_id[u] for u, _, _ in self.edges), dtype=np.int32, count=self.num_edges)
+        self.dst = np.fromiter((self.node_id[v] for _, v, _ in self.edges), dtype=np.int32, count=self.num_edges)
+        self.probability = None
+
+        # Out-edges of node `i` are `out_ptr[i]:out_ptr[i + 1]`.
+        self.out_deg = np.bincount(self.src, minlength=self.num_nodes).astype(np.int32)
+        self.out_ptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(self.out_deg, out=self.out_ptr[1:])
+
+        # In-edges of node `i` are `in_edges[in_ptr[i]:in_ptr[i + 1]]` (edge ids).
+        self.in_edges = np.argsort(self.dst, kind="stable").astype(np.int32)
+        self.in_ptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.dst, minlength=self.num_nodes), out=self.in_ptr[1:])
+
+        # Lazily computed structures
+        self._scc = None
+        self._macro = None
+        self._adjacency = None
+        self._actions = None
+        self._action_code = None
+        self._choice = None
+        self._choice_state = None
+
+    def is_current(self, graph):
+        """
+        Returns True if the index was built for `graph` and the graph was not resized since.
+
+        :note: Edits that keep the number of nodes and edges (rewiring, changing turns) are not detected.
+            See `invalidate_index`.
+        """
+        return (
+            self._owner == id(graph)
+            and self.num_nodes == graph.number_of_nodes()
+            and self.num_edges == graph.number_of_edges()
+        )
+
+    def ids(self, nodes):
+        """ Dense ids of given nodes. """
+        return np.fromiter((self.node_id[u] for u in nodes), dtype=np.int32)
+
+    def mask(self, nodes):
+        """ Boolean mask over dense ids that is True for given nodes. """
+        mask = np.zeros(self.num_nodes, dtype=bool)
+        mask[self.ids(nodes)] = True
+        return mask
+
+    def nodes_of(self, mask):
+        """ Set of nodes selected by a boolean mask over dense ids. """
+        nodes = self.nodes
+        return {nodes[i] for i in np.flatnonzero(mask).tolist()}
+
+    @property
+    def scc(self):
+        """ Strongly connected component decomposition of the graph. Computed on first access. """
+        if self._scc is None:
+            self._scc = SCCIndex(self)
+        return self._scc
+
+    @property
+    def macro(self):
+        """ Two-step (P1 -> P2 -> P1) transitions of the graph. Computed on first access. """
+        if self._macro is None:
+            self._macro = MacroIndex(self)
+        return self._macro
+
+    @property
+    def adjacency(self):
+        """
+        Sparse adjacency matrix (CSR, int32) with `adjacency[u, v]` the number of edges from `u` to `v`.
+        `adjacency @ x` counts, for every node, its out-edges into the nodes selected by the 0/1 vector `x`.
+        Computed on first access.
+        """
+        if self._adjacency is None:
+            self._adjacency = scipy.sparse.csr_matrix(
+                (np.ones(self.num_edges, dtype=np.int32), (self.src, self.dst)),
+                shape=(self.num_nodes, self.num_nodes)
+            )
+        return self._adjacency
+
+    @property
+    def actions(self):
+        """ List of distinct actions (edge keys) in the order of their first occurrence. Computed on first access. """
+        if self._actions is None:
+            self._index_actions()
+        return self._actions
+
+    @property
+    def action_code(self):
+        """ Array (int32) with the position of the action of every edge in `actions`. Computed on first access. """
+        if self._action_code is None:
+            self._index_actions()
+        return self._action_code
+
+    def _index_actions(self):
+        codes = dict()
+        self._action_code = np.fromiter(
+            (codes.setdefault(a, len(codes)) for a in self.keys),
+            dtype=np.int32,
+            count=self.num_edges
+        )
+        self._actions = list(codes)
+
+    @property
+    def choice(self):
+        """
+        Array (int32) with the id of the (state, action) pair of every edge, for nondeterministic/MDP transitions.
+        Edges with the same source and action share a choice id. Computed on first access.
+        """
+        if self._choice is None:
+            self._index_choices()
+        return self._choice
+
+    @property
+    def choice_state(self):
+        """ Array (int32) with the source state of every choice. Computed on first access. """
+        if self._choice_state is None:
+            self._index_choices()
+        return self._choice_state
+
+    def _index_choices(self):
+        pairs = self.src.astype(np.int64) * max(1, len(self.actions)) + self.action_code
+        pairs, choice = np.unique(pairs, return_inverse=True)
+        self._choice = choice.astype(np.int32).reshape(-1)
+        self._choice_state = (pairs // max(1, len(self.actions))).astype(np.int32)
+
+    def action_mask(self, actions):
+        """
+        Boolean mask over edge ids that is True for edges `(u, v, a)` such that `a in actions[u]`.
+
+        :param actions: (dict) Map of states to a set of actions, e.g., SR actions.
+        """
+        selected = []
+        keys = self.keys
+        for u, acts in actions.items():
+            uid = self.node_id[u]
+            selected.extend(e for e in range(self.out_ptr[uid], self.out_ptr[uid + 1]) if keys[e] in acts)
+
+        mask = np.zeros(self.num_edges, dtype=bool)
+        mask[selected] = True
+        return mask
+
+    def actions_of(self, edge_mask, node_mask):
+        """
+        Inverse of `action_mask`. Maps every node selected by `node_mask` to the actions of its edges selected by `edge_mask`.
+
+        :param edge_mask: (np.ndarray) Boolean mask over edge ids.
+        :param node_mask: (np.ndarray) Boolean mask over dense node ids.
+        :return: (dict) Map of nodes to a set of actions.
+        """
+        nodes, keys = self.nodes, self.keys
+        actions = {nodes[i]: set() for i in np.flatnonzero(node_mask).tolist()}
+        edges = np.flatnonzero(edge_mask)
+        for u, e in zip(self.src[edges].tolist(), edges.tolist()):
+            actions[nodes[u]].add(keys[e])
+        return actions
+
+
+class SCCIndex:
+    def __init__(self, index):
+        """
+        Strongly connected components, condensation DAG and its topological order.
+
+        Components are computed by an iterative version of Tarjan's algorithm.
+        Tarjan's algorithm emits components in reverse topological order, so component ids are assigned such that
+        every edge of the condensation DAG goes from a higher id to a lower id.
+
+        :param index: (GraphIndex) Index of the graph.
+        """
+        self.comp, self.num_comps = self._tarjan(index)
+
+        # Condensation DAG in CSR format: successors of component `c` are `dag_succ[dag_ptr[c]:dag_ptr[c + 1]]`.
+        csrc = self.comp[index.src]
+        cdst = self.comp[index.dst]
+        cross = csrc != cdst
+        pairs = np.unique(np.stack([csrc[cross], cdst[cross]]), axis=1)
+        self.dag_succ = pairs[1].astype(np.int32)
+        self.dag_ptr = np.zeros(self.num_comps + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs[0], minlength=self.num_comps), out=self.dag_ptr[1:])
+
+        # Topological order of components (sources first).
+        self.topo_order = np.arange(self.num_comps - 1, -1, -1, dtype=np.int32)
+
+    @staticmethod
+    def _tarjan(index):
+        n = index.num_nodes
+        out_ptr = index.out_ptr.tolist()
+        dst = index.dst.tolist()
+
+        comp = [-1] * n
+        low = [0] * n
+        order = [-1] * n
+        on_stack = [False] * n
+        stack = []
+        num_comps = 0
+        counter = 0
+
+        for root in range(n):
+            if order[root] != -1:
+                continue
+
+            # Call stack holds (node, position of next out-edge to explore).
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            call_stack = [(root, out_ptr[root])]
+
+            while call_stack:
+                u, pos = call_stack[-1]
+                if pos < out_ptr[u + 1]:
+                    call_stack[-1] = (u, pos + 1)
+                    v = dst[pos]
+                    if order[v] == -1:
+                        order[v] = low[v] = counter
+                        counter += 1
+                        stack.append(v)
+                        on_stack[v] = True
+                        call_stack.append((v, out_ptr[v]))
+                    elif on_stack[v] and order[v] < low[u]:
+                        low[u] = order[v]
+                    continue
+
+                # All out-edges of u are explored.
+                call_stack.pop()
+                if call_stack:
+                    parent = call_stack[-1][0]
+                    if low[u] < low[parent]:
+                        low[parent] = low[u]
+
+                # u is the root of a component.
+                if low[u] == order[u]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        comp[w] = num_comps
+                        if w == u:
+                            break
+                    num_comps += 1
+
+        return np.array(comp, dtype=np.int32), num_comps
+
+    def coreachable(self, target_mask):
+        """
+        Nodes that can reach at least one target node.
+
+        Components are processed in reverse topological order, so every component is visited once
+        after all of its successors in the condensation DAG.
+
+        :param target_mask: (np.ndarray) Boolean mask over dense node ids.
+        :return: (np.ndarray) Boolean mask over dense node ids.
+        """
+        reach = np.zeros(self.num_comps, dtype=bool)
+        reach[self.comp[target_mask]] = True
+        dag_ptr = self.dag_ptr.tolist()
+        dag_succ = self.dag_succ.tolist()
+        reach_ = reach.tolist()
+        for c in range(self.num_comps):
+            if not reach_[c]:
+                reach_[c] = any(reach_[d] for d in dag_succ[dag_ptr[c]:dag_ptr[c + 1]])
+        return np.array(reach_, dtype=bool)[self.comp]
+
+
+class MacroIndex:
+    def __init__(self, index):
+        """
+        Two-step (P1 -> P2 -> P1) transitions of an alternating game.
+
+        Every out-edge `(u, v, a)` of a P1 state `u` is a step. For step `i`,
+            * `step_edge[i]` is the id of the edge `(u, v, a)`,
+            * `step_src[i]` and `step_mid[i]` are the ids of `u` and the intermediate state `v`,
+            * `hop_edge[hop_ptr[i]:hop_ptr[i + 1]]` are the ids of the out-edges of `v`.
+
+        :param index: (GraphIndex) Index of the graph.
+        """
+        self.step_edge = np.flatnonzero(index.turn[index.src] == 1).astype(np.int32)
+        self.step_src = index.src[self.step_edge]
+        self.step_mid = index.dst[self.step_edge]
+
+        num_hops = index.out_deg[self.step_mid]
+        self.hop_ptr = np.zeros(len(self.step_edge) + 1, dtype=np.int64)
+        np.cumsum(num_hops, out=self.hop_ptr[1:])
+        offset = index.out_ptr[self.step_mid] - self.hop_ptr[:-1]
+        self.hop_edge = (np.repeat(offset, num_hops) + np.arange(self.hop_ptr[-1])).astype(np.int32)
+
+    def hops(self, steps):
+        """
+        Second hops of the given steps.
+
+        :param steps: (np.ndarray) Step ids.
+        :return: (tuple[np.ndarray, np.ndarray]) Step id and edge id of every out-edge of the intermediate states.
+        """
+        num_hops = self.hop_ptr[steps + 1] - self.hop_ptr[steps]
+        positions = ranges(self.hop_ptr[steps], self.hop_ptr[steps + 1])
+        return np.repeat(steps, num_hops), self.hop_edge[positions]
+
+
+# =============================================================================
+# Utility functions
+# =============================================================================
+def graph_index(graph):
+    """
+    Returns the index of the graph. The index is built on first call and cached in `graph.graph`.
+
+    :param graph: (nx.MultiDiGraph | dict | GraphIndex) Game graph, model dictionary (see `GraphIndex.from_model`)
+        or an index, which is returned as is.
+    :return: (GraphIndex) Index of the graph.
+
+    :note: Graph views (e.g., `nx.subgraph_view`) share `graph.graph` with the underlying graph.
+        Their index is, therefore, built but not cached. The index of a model dictionary is not cached either,
+        so that the model stays serializable. Pass the index instead of the model to share it among solvers.
+    :note: A cached index is reused as long as the graph has the same number of nodes and edges.
+        Call `invalidate_index(graph)` after any other in-place modification of the graph.
+    """
+    if isinstance(graph, GraphIndex):
+        return graph
+    if isinstance(graph, dict):
+        return GraphIndex.from_model(graph)
+
+    index = graph.graph.get(INDEX_KEY, None)
+    if index is not None and index.is_current(graph):
+        return index
+
+    index = GraphIndex(graph)
+    if not nx.is_frozen(graph):
+        graph.graph[INDEX_KEY] = index
+    return index
+
+
+def forward_reachable(graph, sources):
+    """
+    Nodes reachable from the given source nodes, computed by a level-synchronous forward BFS over the index.
+
+    :param graph: (nx.MultiDiGraph) Game graph.
+    :param sources: (iterable) Source nodes, e.g., `graph.graph["init_states"]`.
+    :return: (np.ndarray) Boolean mask over dense node ids.
+    """
+    index = graph_index(graph)
+    reachable = index.mask(sources)
+    frontier = np.flatnonzero(reachable)
+    while len(frontier) > 0:
+        successors = index.dst[ranges(index.out_ptr[frontier], index.out_ptr[frontier + 1])]
+        frontier = np.unique(successors[~reachable[successors]])
+        reachable[frontier] = True
+    return reachable
+
+
+def backward_reachable(index, target_mask, edge_mask=None):
+    """
+    Nodes that can reach a target node using only the selected edges, computed by a level-synchronous backward BFS.
+
+    :param index: (GraphIndex) Index of the graph.
+    :param target_mask: (np.ndarray) Boolean mask of target nodes over dense node ids.
+    :param edge_mask: (np.ndarray) Boolean mask of usable edges over edge ids. Default: all edges.
+    :return: (np.ndarray) Boolean mask over dense node ids.
+    """
+    reachable = target_mask.copy()
+    frontier = np.flatnonzero(reachable)
+    while len(frontier) > 0:
+        edges = index.in_edges[ranges(index.in_ptr[frontier], index.in_ptr[frontier + 1])]
+        if edge_mask is not None:
+            edges = edges[edge_mask[edges]]
+        predecessors = index.src[edges]
+        frontier = np.unique(predecessors[~reachable[predecessors]])
+        reachable[frontier] = True
+    return reachable
+
+
+def restrict(graph, sources):
+    """
+    Copy of the graph restricted to nodes reachable from the given source nodes.
+
+    The restricted graph is closed under successors. Hence, every state in it has the same winning status as in `graph`.
+
+    :param graph: (nx.MultiDiGraph) Game graph.
+    :param sources: (iterable) Source nodes, e.g., `graph.graph["init_states"]`.
+    :return: (nx.MultiDiGraph) Restricted graph.
+    """
+    index = graph_index(graph)
+    reachable = forward_reachable(graph, sources)
+    pruned = graph.subgraph(index.nodes[i] for i in np.flatnonzero(reachable).tolist()).copy()
+    invalidate_index(pruned)
+    logger.info(f"Restricted graph to {pruned.number_of_nodes()} of {graph.number_of_nodes()} states reachable from initial states.")
+    return pruned
+
+
+def invalidate_index(graph):
+    """
+    Drops the cached index of the graph. Must be called after modifying the graph in-place.
+
+    :param graph: (nx.MultiDiGraph) Game graph.
+    """
+    graph.graph.pop(INDEX_KEY, None)
+
+
+def ranges(starts, stops):
+    """
+    Concatenation of `arange(starts[i], stops[i])` for all i, computed without a Python loop.
+
+    :param starts: (np.ndarray) Start of each range.
+    :param stops: (np.ndarray) End (exclusive) of each range.
+    :return: (np.ndarray) Concatenated ranges.
+    """
+    lengths = np.asarray(stops, dtype=np.int64) - starts
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
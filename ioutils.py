@@ -1,5 +1,7 @@
 # import abc
 # import logic
+import numpy as np
+import os
 import simplejson as json
 from loguru import logger
 
@@ -59,3 +61,70 @@ def save_trans(model: dict, fpath: str):
         file.write(f"transitions: {model['metadata']['type_transition']} \n")
         for edge in trans:
             file.write(f"{edge}\n")
+
+
+def save_solution(dpath, solution):
+    """
+    Saves the rank and strategy arrays of a solved `dtptb.SWinReach` to a directory.
+
+    Files:
+        * `rank.npy`: (int32) Rank of every state. `RANK_INF` for states that are not winning.
+        * `strategy.npy`: (int32) Action code chosen at every state, or -1.
+        * `solution.json`: Player, list of states (position = id) and list of actions (position = code).
+
+    :param dpath: (str) Directory to save to. Created if it does not exist.
+    :param solution: (dtptb.SWinReach) Solved game.
+    """
+    os.makedirs(dpath, exist_ok=True)
+    np.save(os.path.join(dpath, "rank.npy"), solution.rank)
+    np.save(os.path.join(dpath, "strategy.npy"), solution.strategy)
+    to_json(
+        os.path.join(dpath, "solution.json"),
+        {"player": solution._player, "nodes": solution.index.nodes, "actions": solution.index.actions}
+    )
+
+
+def load_solution(dpath, mmap=True):
+    """
+    Loads a solution saved by `save_solution`.
+
+    :param dpath: (str) Directory to load from.
+    :param mmap: (bool) If True, the arrays are memory-mapped read-only instead of read into memory.
+    :return: (dict) Keys `player, nodes, actions, rank, strategy`.
+    """
+    solution = from_json(os.path.join(dpath, "solution.json"))
+    solution["rank"] = np.load(os.path.join(dpath, "rank.npy"), mmap_mode="r" if mmap else None)
+    solution["strategy"] = np.load(os.path.join(dpath, "strategy.npy"), mmap_mode="r" if mmap else None)
+    return solution
+
+
+def save_allowed_actions(dpath, solution):
+    """
+    Saves the allowed-action bitmasks of a solved `mdp.ASWinReach` to a directory.
+
+    Files:
+        * `allowed.npy`: (uint64) Bitmask of allowed action codes of every state (see `mdp.ASWinReach.allowed`).
+        * `solution.json`: Player, list of states (position = id) and list of actions (position = code).
+
+    :param dpath: (str) Directory to save to. Created if it does not exist.
+    :param solution: (mdp.ASWinReach) Solved game.
+    """
+    os.makedirs(dpath, exist_ok=True)
+    np.save(os.path.join(dpath, "allowed.npy"), solution.allowed)
+    to_json(
+        os.path.join(dpath, "solution.json"),
+        {"player": solution._player, "nodes": solution.index.nodes, "actions": solution.index.actions}
+    )
+
+
+def load_allowed_actions(dpath, mmap=True):
+    """
+    Loads allowed-action bitmasks saved by `save_allowed_actions`.
+
+    :param dpath: (str) Directory to load from.
+    :param mmap: (bool) If True, the array is memory-mapped read-only instead of read into memory.
+    :return: (dict) Keys `player, nodes, actions, allowed`.
+    """
+    solution = from_json(os.path.join(dpath, "solution.json"))
+    solution["allowed"] = np.load(os.path.join(dpath, "allowed.npy"), mmap_mode="r" if mmap else None)
+    return solution
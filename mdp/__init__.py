@@ -1 +1 @@
-from mdp.solvers import ASWinReach
\ No newline at end of file
+from mdp.solvers import ASWinReach, MaxReachProb, solve_batch
\ No newline at end of file
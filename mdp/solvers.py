@@ -1,4 +1,9 @@
+import graphutils
 import networkx as nx
+import numpy as np
+import runutils
+import scipy.sparse
+from scipy.sparse import csgraph
 from loguru import logger
 import copy
 
@@ -6,6 +11,8 @@ import copy
 class ASWinReach:
     SOLV_POMC = "pomc-alg45"
     SOLV_ATTR = "attractor"
+    SOLV_COUNTER = "counter"
+    SOLV_MEC = "mec"
     PLAYER_NATURE = 0
     PLAYER1 = 1
 
@@ -17,11 +24,102 @@ class ASWinReach:
 
         # Solver parameters:
         self._is_solved = False
-        self._solver = kwargs.get("solver", ASWinReach.SOLV_POMC)
+        self._solver = kwargs.get(
+            "solver", ASWinReach.SOLV_POMC if isinstance(model, nx.MultiDiGraph) else ASWinReach.SOLV_COUNTER
+        )
+        self._budget = runutils.Budget.from_kwargs(kwargs)
+        self._owns_budget = kwargs.get("budget", None) is None
+        self._warm_start = kwargs.get("warm_start", None)
 
         # Output parameters:
-        self.winning_nodes = {ASWinReach.PLAYER1: set(), ASWinReach.PLAYER_NATURE: set()}
-        self.winning_edges = {ASWinReach.PLAYER1: set(), ASWinReach.PLAYER_NATURE: set()}
+        #   `win_mask` holds boolean arrays over the dense node ids of `index`.
+        #   `win_edge_mask` holds boolean arrays over the edge ids of `index`. Edges of player 1 are those that
+        #   remain in the almost-sure winning sub-MDP; all other edges are listed under player 2.
+        #   `winning_nodes`, `win_edge_mask` and `winning_edges` are derived on first access.
+        #   Array-based solvers accept the model as a graph, a model dictionary or a `graphutils.GraphIndex`.
+        self.index = graphutils.graph_index(model)
+        self.win_mask = None
+        self._win_edge_mask = None
+        self._hidden_edges = None
+        self._winning_nodes = None
+        self._winning_edges = None
+        self._allowed = None
+        self._local = None
+        self.reset()
+
+        # A warm start must be a solution of the same model, with a subset of the final states.
+        warm = self._warm_start
+        if warm is not None:
+            if not warm._is_solved:
+                raise ValueError("`warm_start` must be a solved mdp.ASWinReach.")
+            same_model = warm._model is model and (
+                warm.index is self.index
+                or (warm.index.nodes == self.index.nodes and warm.index.edges == self.index.edges)
+            )
+            if not same_model:
+                raise ValueError("`warm_start` must be a solution of the same (unmodified) model.")
+            if not warm._final <= self._final:
+                raise ValueError("Final states of `warm_start` must be a subset of `final`.")
+
+    @property
+    def winning_nodes(self):
+        """ Map of player to the set of states winning for that player. """
+        if self._winning_nodes is None:
+            self._winning_nodes = {p: self.index.nodes_of(mask) for p, mask in self.win_mask.items()}
+        return self._winning_nodes
+
+    @property
+    def win_edge_mask(self):
+        """ Map of player to the boolean mask over edge ids of edges winning for that player. """
+        if self._win_edge_mask is None:
+            index = self.index
+            is_win = self.win_mask[self._player]
+            is_win_edge = is_win[index.src] & is_win[index.dst]
+            if self._hidden_edges:
+                is_win_edge &= np.fromiter(
+                    (edge not in self._hidden_edges for edge in index.edges),
+                    dtype=bool,
+                    count=index.num_edges
+                )
+            self._win_edge_mask = {self._player: is_win_edge, 3 - self._player: ~is_win_edge}
+        return self._win_edge_mask
+
+    @property
+    def winning_edges(self):
+        """ Map of player to the set of edges `(u, v, key)` winning for that player. """
+        if self._winning_edges is None:
+            edges = self.index.edges
+            self._winning_edges = {
+                p: {edges[e] for e in np.flatnonzero(mask).tolist()} for p, mask in self.win_edge_mask.items()
+            }
+        return self._winning_edges
+
+    @property
+    def allowed(self):
+        """
+        Allowed actions of P1 as a bitmask array of shape (num_nodes, ceil(len(index.actions) / 64)), dtype uint64.
+
+        Bit `c % 64` of word `c // 64` of a winning, non-final state is set iff the action with code `c`
+        (position in `index.actions`) keeps every successor in the almost-sure winning region.
+        Playing every allowed action with positive probability, e.g., uniformly at random, wins almost-surely.
+        Rows of other states are zero.
+        """
+        if self._allowed is None:
+            index = self.index
+            edges = np.flatnonzero(self.win_edge_mask[self._player])
+            codes = index.action_code[edges].astype(np.int64)
+            pairs = np.unique(index.src[edges].astype(np.int64) * max(1, len(index.actions)) + codes)
+            states, codes = pairs // max(1, len(index.actions)), pairs % max(1, len(index.actions))
+            self._allowed = np.zeros((index.num_nodes, (len(index.actions) + 63) // 64), dtype=np.uint64)
+            np.bitwise_or.at(self._allowed, (states, codes // 64), np.uint64(1) << (codes % 64).astype(np.uint64))
+        return self._allowed
+
+    def allowed_actions(self, state):
+        """ Set of allowed actions of P1 at `state` (see `allowed`). Empty if `state` is not winning or is final. """
+        row = self.allowed[self.index.node_id[state]]
+        codes = np.flatnonzero(np.unpackbits(row.astype("<u8").view(np.uint8), bitorder="little"))
+        actions = self.index.actions
+        return {actions[c] for c in codes.tolist()}
 
     def solve(self, force=False):
         # If game is solved and `force` is False, then warn the user.
@@ -29,12 +127,42 @@ class ASWinReach:
             logger.warning(f"Game is solved. To solve again, call `solve(force=True)`.")
             return
 
-        # Invoke the appropriate solver by asserting appropriate model type.
+        # Start the deadline, unless the budget is shared with (and started by) a caller.
+        if self._owns_budget:
+            self._budget.start()
+
+        # Warm start: the previous solution is grown by the final states added since (see `add_targets`).
+        if self._warm_start is not None:
+            warm, self._warm_start = self._warm_start, None
+            if not warm._final <= self._final:
+                raise ValueError("Final states of `warm_start` must be a subset of `final`.")
+            self.reset()
+            self.win_mask = {p: mask.copy() for p, mask in warm.win_mask.items()}
+            self._win_edge_mask = {p: mask.copy() for p, mask in warm.win_edge_mask.items()}
+            nodes, self._final = self._final - warm._final, set(warm._final)
+            self._is_solved = True
+            self.add_targets(nodes)
+            return
+
+        # Invoke the appropriate solver. Only the pomc solver needs the model as a graph.
         if self._solver == ASWinReach.SOLV_POMC:
-            assert isinstance(self._model, nx.MultiDiGraph), \
-                f"dtptb.SWinReach python solver expects model of type `nx.MultiDiGraph`, not `{type(self._model)}`."
+            if not isinstance(self._model, nx.MultiDiGraph):
+                raise ValueError(
+                    f"mdp.ASWinReach solver `{ASWinReach.SOLV_POMC}` expects model of type `nx.MultiDiGraph`, "
+                    f"not `{type(self._model).__name__}`. Model dictionaries and `graphutils.GraphIndex` are supported "
+                    f"by solvers `{ASWinReach.SOLV_COUNTER}`, `{ASWinReach.SOLV_MEC}` and `{ASWinReach.SOLV_ATTR}`."
+                )
             self.solve_pomc45()
 
+        if self._solver == ASWinReach.SOLV_ATTR:
+            self.solve_attr()
+
+        if self._solver == ASWinReach.SOLV_COUNTER:
+            self.solve_counter()
+
+        if self._solver == ASWinReach.SOLV_MEC:
+            self.solve_mec()
+
     def solve_pomc45(self):
         """
         Expects model to be networkx graph.
@@ -49,8 +177,8 @@ class ASWinReach:
         # If no final states, do not run solver utility. Declare all states are winning for opponent.
         if len(self._final) == 0:
             logger.warning(f"Game has no final states. Marking all states to be winning for player-{3 - self._player}.")
-            self.winning_nodes[ASWinReach.PLAYER_NATURE] = self._model.nodes()
-            self.winning_edges[ASWinReach.PLAYER_NATURE] = self._model.edges()
+            self.win_mask[ASWinReach.PLAYER_NATURE] = np.ones(self.index.num_nodes, dtype=bool)
+            self._winning_nodes = None
             self._is_solved = True
             return
 
@@ -72,12 +200,16 @@ class ASWinReach:
         hidden_edges.update([(u, v, a) for u in b for _, v, a in self._model.out_edges(u, keys=True)])
 
         # 2. Identify disconnected nodes
-        disconnected = self.disconnected(graph, b)
+        #   No node is hidden yet, so these are the nodes that cannot reach B in the model.
+        #   The SCC index of the model answers this query without a reverse BFS.
+        index = self.index
+        disconnected = index.nodes_of(~index.scc.coreachable(index.mask(b)))
 
         # 3. Initialize U
         set_u = {s for s in graph.nodes() if s in disconnected}
 
         # Alg. 45 from PoMC.
+        iteration = 0
         while True:
             set_r = set_u.copy()
             while len(set_r) > 0:
@@ -96,73 +228,431 @@ class ASWinReach:
                 hidden_nodes.add(u)
             disconnected = self.disconnected(graph, b)
             set_u = {s for s in set(graph.nodes()) - set_u if s in disconnected}
+            iteration += 1
+            self._budget.step(iteration, len(set_u))
             if len(set_u) == 0:
                 break
 
         # Any node which is not hidden is winning for P1.
-        self.winning_nodes[self._player] = set(graph.nodes())
-        self.winning_nodes[1 - self._player] = set(self._model.nodes()) - self.winning_nodes[self._player]
-        self.winning_edges[self._player] = set(graph.edges(keys=True))
-        self.winning_edges[3 - self._player] = set(self._model.edges(keys=True)) - self.winning_nodes[self._player]
+        is_win = index.mask(graph.nodes())
+        self.win_mask = {self._player: is_win, 1 - self._player: ~is_win}
+        self._winning_nodes = None
+        self._hidden_edges = hidden_edges
+
+        # Mark the game to be solved
+        self._is_solved = True
+
+    def solve_counter(self):
+        """
+        Accepts the model as a networkx graph, a model dictionary or a `graphutils.GraphIndex`.
+
+        Computes the same winning region as `solve_pomc45` over arrays.
+        Transitions with the same source and action form a choice. Choices and states are deleted by clearing flags,
+        and every state keeps a counter of its alive choices, so a state is deleted when its counter drops to zero.
+        Backward reachability of the final states is recomputed over the alive subgraph only.
+        """
+        # Reset solver
+        self.reset()
+
+        # If no final states, do not run solver utility. Declare all states are winning for opponent.
+        if len(self._final) == 0:
+            logger.warning(f"Game has no final states. Marking all states to be winning for player-{3 - self._player}.")
+            self.win_mask[ASWinReach.PLAYER_NATURE] = np.ones(self.index.num_nodes, dtype=bool)
+            self._winning_nodes = None
+            self._is_solved = True
+            return
+
+        # 1. Mark B absorbing: final states have no alive choices.
+        index = self.index
+        choice, choice_state = index.choice, index.choice_state
+        is_final = index.mask(u for u in self._final if u in index.node_id)
+        is_node = np.ones(index.num_nodes, dtype=bool)
+        is_choice = ~is_final[choice_state]
+        counter = np.bincount(choice_state[is_choice], minlength=index.num_nodes)
+
+        # 2. Initialize U: states that cannot reach B.
+        is_u = ~graphutils.backward_reachable(index, is_final, is_choice[choice])
+
+        # Alg. 45 from PoMC.
+        iteration = 0
+        while True:
+            # Delete states in U. Delete every alive choice that may lead to a deleted state,
+            #   and delete the states that lose their last choice.
+            queue = np.flatnonzero(is_u).tolist()
+            for u in queue:
+                for e in index.in_edges[index.in_ptr[u]:index.in_ptr[u + 1]].tolist():
+                    t, c = index.src[e], choice[e]
+                    if not is_node[t] or is_u[t] or not is_choice[c]:
+                        continue
+                    is_choice[c] = False
+                    counter[t] -= 1
+                    if counter[t] == 0:
+                        is_u[t] = True
+                        queue.append(int(t))
+                is_node[u] = False
+            is_u[:] = False
+
+            # Recompute states that cannot reach B in the alive subgraph.
+            is_edge = is_choice[choice] & is_node[index.src] & is_node[index.dst]
+            is_u = is_node & ~graphutils.backward_reachable(index, is_final & is_node, is_edge)
+            iteration += 1
+            self._budget.step(iteration, int(np.count_nonzero(is_u)))
+            if not is_u.any():
+                break
+
+        # Any state which is not deleted is winning for P1. Alive transitions are winning edges of P1.
+        self.win_mask = {self._player: is_node, 1 - self._player: ~is_node}
+        self._win_edge_mask = {self._player: is_edge, 3 - self._player: ~is_edge}
+        self._winning_nodes = None
+
+        # Mark the game to be solved
+        self._is_solved = True
+
+    def solve_mec(self):
+        """
+        Accepts the model as a networkx graph, a model dictionary or a `graphutils.GraphIndex`.
+
+        Computes the same winning region as `solve_pomc45` using the maximal end-component (MEC) decomposition.
+
+        1. MECs are computed by SCC refinement: choices that may leave the SCC of their state are removed until
+            the SCCs are stable. Final states are absorbing and hence, are not part of any MEC.
+        2. Every MEC is collapsed into one state that keeps only the choices exiting the MEC. Within a MEC,
+            P1 can visit all states with probability 1 and thus, use any of the exiting choices.
+        3. The collapsed MDP has no end components, so every play eventually stops in a state without choices.
+            A state is almost-sure winning iff P1 can avoid, with probability 1, stopping anywhere but in a final state.
+            The losing states are computed by a counter-based attractor: a choice loses if any successor loses,
+            and a state loses if all of its choices lose.
+        """
+        # Reset solver
+        self.reset()
+
+        # If no final states, do not run solver utility. Declare all states are winning for opponent.
+        if len(self._final) == 0:
+            logger.warning(f"Game has no final states. Marking all states to be winning for player-{3 - self._player}.")
+            self.win_mask[ASWinReach.PLAYER_NATURE] = np.ones(self.index.num_nodes, dtype=bool)
+            self._winning_nodes = None
+            self._is_solved = True
+            return
+
+        index = self.index
+        choice, choice_state = index.choice, index.choice_state
+        is_final = index.mask(u for u in self._final if u in index.node_id)
+
+        # 1. MEC decomposition by SCC refinement.
+        is_choice = ~is_final[choice_state]
+        iteration = 0
+        while True:
+            is_edge = is_choice[choice]
+            _, comp = csgraph.connected_components(
+                scipy.sparse.csr_matrix(
+                    (np.ones(np.count_nonzero(is_edge), dtype=np.int8), (index.src[is_edge], index.dst[is_edge])),
+                    shape=(index.num_nodes, index.num_nodes)
+                ),
+                directed=True,
+                connection="strong"
+            )
+            leaves = np.unique(choice[is_edge & (comp[index.src] != comp[index.dst])])
+            is_choice[leaves] = False
+            iteration += 1
+            self._budget.step(iteration, len(leaves))
+            if len(leaves) == 0:
+                break
+
+        # 2. Collapse MECs. States with an alive choice belong to a MEC; others are singletons.
+        is_mec = np.bincount(choice_state[is_choice], minlength=index.num_nodes) > 0
+        _, node = np.unique(
+            np.where(is_mec, comp, comp.max(initial=0) + 1 + np.arange(index.num_nodes)),
+            return_inverse=True
+        )
+        node = node.reshape(-1)
+        num_quotient = node.max(initial=-1) + 1
+        is_exit = ~is_final[choice_state] & ~is_choice
+        members = np.argsort(node, kind="stable")
+        member_ptr = np.searchsorted(node[members], np.arange(num_quotient + 1))
+
+        # 3. Losing attractor of the collapsed MDP, seeded by non-final states without choices.
+        counter = np.bincount(node[choice_state[is_exit]], minlength=num_quotient)
+        is_lost = counter == 0
+        is_lost[node[is_final]] = False
+        is_lost_choice = np.zeros(len(choice_state), dtype=bool)
+        queue = np.flatnonzero(is_lost).tolist()
+        for q in queue:
+            for s in members[member_ptr[q]:member_ptr[q + 1]].tolist():
+                for c in choice[index.in_edges[index.in_ptr[s]:index.in_ptr[s + 1]]].tolist():
+                    if not is_exit[c] or is_lost_choice[c]:
+                        continue
+                    is_lost_choice[c] = True
+                    p = node[choice_state[c]]
+                    counter[p] -= 1
+                    if counter[p] == 0 and not is_lost[p]:
+                        is_lost[p] = True
+                        queue.append(int(p))
+
+        # Winning edges of P1 are the transitions of choices of winning states whose successors are all winning.
+        is_win = ~is_lost[node]
+        is_bad = np.bincount(choice[~is_win[index.dst]], minlength=len(choice_state)) > 0
+        is_edge = (~is_final[choice_state] & is_win[choice_state] & ~is_bad)[choice]
+
+        self.win_mask = {self._player: is_win, 1 - self._player: ~is_win}
+        self._win_edge_mask = {self._player: is_edge, 3 - self._player: ~is_edge}
+        self._winning_nodes = None
 
         # Mark the game to be solved
         self._is_solved = True
 
-    # def solve_attr(self):
-    #     # Reset solver
-    #     self.reset()
-    #
-    #     # If no final states, do not run solver utility. Declare all states are winning for opponent.
-    #     if len(self._final) == 0:
-    #         logger.warning(f"Game has no final states. Marking all states to be winning for player-{3 - self._player}.")
-    #         self.winning_nodes[ASWinReach.PLAYER_NATURE] = self._model.nodes()
-    #         self.winning_edges[ASWinReach.PLAYER_NATURE] = self._model.edges()
-    #         self._is_solved = True
-    #         return
-    #
-    #     # Construct suppDict.
-    #     # TODO.
-    #
-    #     # Define pre function
-    #     def pre(x, y):
-    #         pre_ = set()
-    #         for s in self._model.nodes():
-    #             for a in mdp.actlist:
-    #                 if len(mdp.suppDict[(s, a)].intersection(X)) != 0 and mdp.suppDict[(s, a)].issubset(Y):
-    #                     Pre.add(s)
-    #                     break
-    #         return X.union(Pre)
-    #
-    #     # Initializations
-    #     set_y = set(self._model.nodes())
-    #     x_new = set([])
-    #     x_level_sets = []
-    #     y_level_sets = []
-    #     flag = True
-    #     while True:
-    #         if x_new == set_y:
-    #             break
-    #         else:
-    #             if flag:
-    #                 flag = False
-    #                 pass
-    #             else:
-    #                 set_y = x_new
-    #                 x_level_sets = []
-    #             set_x = set(self._final)
-    #             x_level_sets.append(set_x)
-    #             y_level_sets.append(set_y)
-    #             while True:
-    #                 x_new = pre(set_x, set_y)
-    #                 if x_new == set_x:
-    #                     break
-    #                 else:
-    #                     set_x = x_new
-    #                     x_level_sets.append(set_x)
+    def solve_attr(self):
+        """
+        Accepts the model as a networkx graph, a model dictionary or a `graphutils.GraphIndex`.
+
+        Computes the same winning region as `solve_pomc45` by the nested fixpoint
+            nu Y. mu X. B | pre(X, Y),
+        where `pre(X, Y)` is the set of states having an action whose support intersects X and is contained in Y.
+        The support of every (state, action) pair is the set of successors of its choice in `index`,
+        so that `pre(X, Y)` is evaluated by counting, for every choice, its successors in X and outside Y.
+        """
+        # Reset solver
+        self.reset()
+
+        # If no final states, do not run solver utility. Declare all states are winning for opponent.
+        if len(self._final) == 0:
+            logger.warning(f"Game has no final states. Marking all states to be winning for player-{3 - self._player}.")
+            self.win_mask[ASWinReach.PLAYER_NATURE] = np.ones(self.index.num_nodes, dtype=bool)
+            self._winning_nodes = None
+            self._is_solved = True
+            return
+
+        # Support index: successor `index.dst[e]` is in the support of choice `choice[e]` of state `choice_state[c]`.
+        index = self.index
+        choice, choice_state, dst = index.choice, index.choice_state, index.dst
+        num_choices = len(choice_state)
+        is_final = index.mask(u for u in self._final if u in index.node_id)
+
+        def pre(x, y):
+            is_hit = np.bincount(choice[x[dst]], minlength=num_choices) > 0
+            is_safe = np.bincount(choice[~y[dst]], minlength=num_choices) == 0
+            pre_ = x.copy()
+            pre_[choice_state[is_hit & is_safe]] = True
+            return pre_
+
+        # Outer greatest fixpoint over Y, inner least fixpoint over X.
+        set_y = np.ones(index.num_nodes, dtype=bool)
+        iteration = 0
+        while True:
+            set_x = is_final.copy()
+            while True:
+                x_new = pre(set_x, set_y)
+                iteration += 1
+                self._budget.step(iteration, int(np.count_nonzero(x_new & ~set_x)))
+                if np.array_equal(x_new, set_x):
+                    break
+                set_x = x_new
+
+            if np.array_equal(set_x, set_y):
+                break
+            set_y = set_x
+
+        # Winning edges of P1 are the transitions of choices of winning states whose successors are all winning.
+        is_win = set_y
+        is_bad = np.bincount(choice[~is_win[dst]], minlength=num_choices) > 0
+        is_edge = (~is_final[choice_state] & is_win[choice_state] & ~is_bad)[choice]
+
+        self.win_mask = {self._player: is_win, 1 - self._player: ~is_win}
+        self._win_edge_mask = {self._player: is_edge, 3 - self._player: ~is_edge}
+        self._winning_nodes = None
+
+        # Mark the game to be solved
+        self._is_solved = True
 
     def reset(self):
-        self.winning_nodes = {1: set(), 2: set()}
-        self.winning_edges = {1: set(), 2: set()}
+        # The solution is cleared, so the MDP is unsolved until a solver marks it solved again.
+        # A cancelled solve thus leaves the MDP unsolved rather than with a partial solution.
+        self._is_solved = False
+        self.win_mask = {
+            ASWinReach.PLAYER1: np.zeros(self.index.num_nodes, dtype=bool),
+            ASWinReach.PLAYER_NATURE: np.zeros(self.index.num_nodes, dtype=bool)
+        }
+        self._win_edge_mask = None
+        self._hidden_edges = None
+        self._winning_nodes = None
+        self._winning_edges = None
+        self._allowed = None
+        self._local = None
+
+    def is_almost_sure_winning(self, state):
+        """
+        Decides whether `state` is almost-sure winning for P1 without solving the whole MDP.
+
+        If the game is solved, the answer is read from the solution. Otherwise, the states forward reachable from
+        `state` are explored, stopping at final states and at states decided by earlier queries.
+        The nested fixpoint of `solve_attr` is then evaluated over the choices of the explored states only,
+        with the decided winning states as targets. The explored states are closed under successors up to decided
+        states, so their verdicts are exact and are memoized for later queries.
+
+        :param state: A state of the MDP.
+        :return: (bool) True if `state` is almost-sure winning for P1.
+        """
+        index = self.index
+        uid = index.node_id[state]
+        if self._is_solved:
+            return bool(self.win_mask[self._player][uid])
+
+        # Memo of local queries: 1 if state is winning for P1, 0 if it is not, -1 if it is not decided.
+        if self._local is None:
+            self._local = np.where(index.mask(u for u in self._final if u in index.node_id), 1, -1).astype(np.int8)
+        local = self._local
+
+        if local[uid] == -1:
+            # Forward exploration of undecided states.
+            explored = {uid}
+            stack = [uid]
+            while stack:
+                vid = stack.pop()
+                for wid in index.dst[index.out_ptr[vid]:index.out_ptr[vid + 1]].tolist():
+                    if local[wid] == -1 and wid not in explored:
+                        explored.add(wid)
+                        stack.append(wid)
+
+            # Support index of the choices of explored states, with local choice ids and local state ids
+            #   over the explored states and their decided successors.
+            explored = np.fromiter(explored, dtype=np.int64, count=len(explored))
+            edges = graphutils.ranges(index.out_ptr[explored], index.out_ptr[explored + 1])
+            rows, edge_choice = np.unique(index.choice[edges], return_inverse=True)
+            states, edge_dst = np.unique(np.r_[explored, index.dst[edges]], return_inverse=True)
+            edge_choice, edge_dst = edge_choice.reshape(-1), edge_dst.reshape(-1)[len(explored):]
+            owners = np.searchsorted(states, index.choice_state[rows])
+
+            # Nested fixpoint over explored states, with decided winning states as targets.
+            is_target = local[states] == 1
+            set_y = local[states] != 0
+            while True:
+                is_safe = np.bincount(edge_choice[~set_y[edge_dst]], minlength=len(rows)) == 0
+                set_x = is_target.copy()
+                while True:
+                    is_hit = np.bincount(edge_choice[set_x[edge_dst]], minlength=len(rows)) > 0
+                    new = owners[is_hit & is_safe]
+                    new = new[~set_x[new]]
+                    if len(new) == 0:
+                        break
+                    set_x[new] = True
+
+                if np.array_equal(set_x, set_y):
+                    break
+                set_y = set_x
+
+            local[states] = set_y
+
+        return bool(local[uid] == 1)
+
+    def add_targets(self, nodes):
+        """
+        Adds `nodes` to the final states of a solved game and grows the winning region incrementally.
+
+        The winning region W' for the final states B | N equals the almost-sure winning region for W | N,
+        where W is the current winning region. States outside W that gain do so only if they can reach N
+        through states outside W. Hence, the candidates are found by a backward search from N that stops at W
+        and at final states, and the nested fixpoint of `solve_attr` is evaluated over the choices of the candidates
+        only, with targets W | N. Winning edges are updated for the out-edges of the new final states,
+        the states that gain, and their winning predecessors.
+
+        :param nodes: (iterable) States to add to the final states, e.g., new decoys.
+        """
+        nodes = {u for u in nodes if u not in self._final}
+
+        # If game is not solved, the new final states are picked up by the next solve.
+        if not self._is_solved:
+            self._final |= nodes
+            self.reset()
+            return
+
+        if len(nodes) == 0:
+            return
+
+        index = self.index
+        choice, choice_state, src, dst = index.choice, index.choice_state, index.src, index.dst
+        edge_mask = self.win_edge_mask
+        self._final |= nodes
+        new_ids = index.ids(u for u in nodes if u in index.node_id).astype(np.int64)
+        is_final = index.mask(u for u in self._final if u in index.node_id)
+        is_win = self.win_mask[self._player]
+
+        # 1. Candidates: states outside W that reach a new final state through non-final states outside W.
+        is_seen = np.zeros(index.num_nodes, dtype=bool)
+        frontier = new_ids[~is_win[new_ids]]
+        is_seen[frontier] = True
+        changed = [frontier]
+
+        # New final states are winning.
+        is_win[new_ids] = True
+        self.win_mask[1 - self._player][new_ids] = False
+        candidates = []
+        while len(frontier) > 0:
+            pred = src[index.in_edges[graphutils.ranges(index.in_ptr[frontier], index.in_ptr[frontier + 1])]]
+            frontier = np.unique(pred[~is_win[pred] & ~is_final[pred] & ~is_seen[pred]]).astype(np.int64)
+            is_seen[frontier] = True
+            candidates.append(frontier)
+        candidates = np.concatenate(candidates) if candidates else np.zeros(0, dtype=np.int64)
+
+        # 2. Nested fixpoint over the choices of candidates, with local choice ids and local state ids
+        #   over the candidates and their successors.
+        if len(candidates) > 0:
+            edges = graphutils.ranges(index.out_ptr[candidates], index.out_ptr[candidates + 1])
+            rows, edge_choice = np.unique(choice[edges], return_inverse=True)
+            states, edge_dst = np.unique(np.r_[candidates, dst[edges]], return_inverse=True)
+            edge_choice, edge_dst = edge_choice.reshape(-1), edge_dst.reshape(-1)[len(candidates):]
+            owners = np.searchsorted(states, choice_state[rows])
+
+            is_target = is_win[states] | is_final[states]
+            set_y = is_target.copy()
+            set_y[np.searchsorted(states, candidates)] = True
+            iteration = 0
+            while True:
+                is_safe = np.bincount(edge_choice[~set_y[edge_dst]], minlength=len(rows)) == 0
+                set_x = is_target.copy()
+                while True:
+                    is_hit = np.bincount(edge_choice[set_x[edge_dst]], minlength=len(rows)) > 0
+                    new = owners[is_hit & is_safe]
+                    new = np.unique(new[~set_x[new]])
+                    iteration += 1
+                    self._budget.step(iteration, len(new))
+                    if len(new) == 0:
+                        break
+                    set_x[new] = True
+
+                if np.array_equal(set_x, set_y):
+                    break
+                set_y = set_x
+
+            gained = states[set_y & ~is_target]
+            is_win[gained] = True
+            self.win_mask[1 - self._player][gained] = False
+            changed.append(gained)
+
+        # 3. Winning edges of P1 are the transitions of choices of winning states whose successors are all winning.
+        #   They change only for out-edges of new final states, of states that gain,
+        #   and of winning predecessors of states that gain (including new final states).
+        changed = np.concatenate(changed).astype(np.int64)
+        pred = src[index.in_edges[graphutils.ranges(index.in_ptr[changed], index.in_ptr[changed + 1])]]
+        affected = np.unique(np.r_[new_ids, changed, pred[is_win[pred]]]).astype(np.int64)
+        edges = graphutils.ranges(index.out_ptr[affected], index.out_ptr[affected + 1])
+        rows, edge_choice = np.unique(choice[edges], return_inverse=True)
+        edge_choice = edge_choice.reshape(-1)
+        is_bad = np.bincount(edge_choice[~is_win[dst[edges]]], minlength=len(rows)) > 0
+        is_ok = (~is_final[choice_state[rows]] & is_win[choice_state[rows]] & ~is_bad)[edge_choice]
+        edge_mask[self._player][edges] = is_ok
+        edge_mask[3 - self._player][edges] = ~is_ok
+
+        self._winning_nodes = None
+        self._winning_edges = None
+        self._allowed = None
+
+    def _mark_solved(self, is_win, is_edge):
+        """ Stores the winning states and the winning edges of P1 computed outside of `solve`, e.g., by `solve_batch`. """
+        self.win_mask = {self._player: is_win, 1 - self._player: ~is_win}
+        self._win_edge_mask = {self._player: is_edge, 3 - self._player: ~is_edge}
+        self._winning_nodes = None
+        self._winning_edges = None
+        self._allowed = None
+        self._is_solved = True
 
     def final(self):
         return self._final
@@ -186,3 +676,292 @@ class ASWinReach:
             if graph["input"][uid, vid, key] == act:
                 # print(f"\tHiding {uid}, {act}, edge:{uid, vid, key}")
                 graph.hide_edge(uid, vid, key)
+
+
+def solve_batch(model, finals, **kwargs):
+    """
+    Computes the almost-sure winning regions of P1 in MDP `model` for several sets of final states in one sweep.
+
+    The sets are packed as bit-lanes of uint64 words, one row of words per state, and the nested fixpoint
+    of `ASWinReach.solve_attr` is evaluated for all lanes at once. The choice index of `model`, with the edges
+    of every choice made contiguous, is built once and shared by all lanes: `pre(X, Y)` OR-s the words of
+    the successors of every choice (support intersects X), AND-s them (support contained in Y), and OR-s
+    the result over the choices of every state.
+
+    :param model: (nx.MultiDiGraph | dict | graphutils.GraphIndex) MDP graph, model dictionary or its index.
+    :param finals: (list) List of K sets of final states.
+    :param kwargs: `timeout`, `cancel`, `progress` or `budget` (see `runutils`). Progress reports the number of
+        new (state, set) pairs of every iteration.
+    :return: (list) K solved `ASWinReach` instances, in the order of `finals`.
+
+    :note: Decoy allocation does not use it. The hypergames of `DASWinReach` for different candidates differ in
+        their transitions (SR actions depend on the fakes), not only in their final states, and the default
+        `DASWinReach.SOLV_DIRECT` solver does not build an MDP at all.
+    """
+    budget = runutils.Budget.from_kwargs(kwargs)
+    index = graphutils.graph_index(model)
+    finals = [set(final) for final in finals]
+    n_lanes = len(finals)
+    n_words = (n_lanes + 63) // 64
+
+    # Final states of every lane.
+    is_final = np.zeros((index.num_nodes, n_words), dtype=np.uint64)
+    for lane, final in enumerate(finals):
+        is_final[index.ids(u for u in final if u in index.node_id), lane // 64] |= np.uint64(1) << np.uint64(lane % 64)
+
+    # Successors of every choice are contiguous segments of `succ`. Choices are sorted by state.
+    choice, choice_state = index.choice, index.choice_state
+    order = np.argsort(choice, kind="stable")
+    succ = index.dst[order]
+    starts = np.searchsorted(choice[order], np.arange(len(choice_state)))
+    state_starts = np.flatnonzero(np.r_[True, choice_state[1:] != choice_state[:-1]]) if len(choice_state) else starts
+    owners = choice_state[state_starts]
+
+    # Outer greatest fixpoint over Y, inner least fixpoint over X.
+    set_y = np.full((index.num_nodes, n_words), np.iinfo(np.uint64).max, dtype=np.uint64)
+    iteration = 0
+    while len(choice_state) > 0:
+        is_safe = np.bitwise_and.reduceat(set_y[succ], starts, axis=0)
+        set_x = is_final.copy()
+        while True:
+            is_hit = np.bitwise_or.reduceat(set_x[succ], starts, axis=0)
+            new = np.bitwise_or.reduceat(is_hit & is_safe, state_starts, axis=0) & ~set_x[owners]
+            iteration += 1
+            budget.step(iteration, int(np.unpackbits(new.astype("<u8").view(np.uint8)).sum()))
+            if not new.any():
+                break
+            set_x[owners] |= new
+
+        if np.array_equal(set_x, set_y):
+            break
+        set_y = set_x
+    else:
+        set_y = is_final
+
+    # Wrap each lane as a solved game. Bit `b` of word `w` is lane `64 * w + b`.
+    def unpack(words):
+        return np.unpackbits(words.astype("<u8").view(np.uint8), axis=1, bitorder="little")[:, :n_lanes].astype(bool)
+
+    is_win = unpack(set_y)
+    is_final = unpack(is_final)
+    is_safe = unpack(np.bitwise_and.reduceat(set_y[succ], starts, axis=0)) if len(choice_state) else \
+        np.zeros((0, n_lanes), dtype=bool)
+    solutions = []
+    for lane, final in enumerate(finals):
+        solution = ASWinReach(model if isinstance(model, nx.MultiDiGraph) else index, final)
+        is_edge = (~is_final[choice_state, lane] & is_win[choice_state, lane] & is_safe[:, lane])[choice]
+        solution._mark_solved(is_win[:, lane].copy(), is_edge)
+        solutions.append(solution)
+    return solutions
+
+
+class MaxReachProb:
+    """
+    Maximum probability of reaching the final states in an MDP, computed by sparse value iteration.
+
+    The model is a model dictionary of type `game.TYPE_MDP` with probabilistic transitions, its index
+    (see `graphutils.GraphIndex.from_model`) or a `nx.MultiDiGraph` whose edges carry a `probability` attribute
+    (see `game.to_graph`). Transitions with the same source and action
+    form a choice, and the transition probabilities of all choices are held in a (choices x states) sparse matrix.
+
+    Keyword arguments:
+        * `method`: (str) Order of updates. One of
+            `METHOD_JACOBI`: All states are updated at once by a sparse matrix-vector product. (Default)
+            `METHOD_GAUSS_SEIDEL`: States are updated one after another, reusing the values updated in the same sweep.
+            `METHOD_TOPOLOGICAL`: SCCs are solved in reverse topological order. SCCs at the same height of the
+                SCC graph are iterated together; acyclic parts of the model are solved in a single update.
+        * `tol`: (float) Iteration stops when no value changes by more than `tol`. Default: 1e-6.
+        * `max_iter`: (int) Maximum number of iterations (sweeps). Default: None, no limit.
+        * `precompute`: (bool) If True, states with probability 1 are computed with `ASWinReach` and excluded
+            from iteration. Default: True.
+            States with probability 0 (those that cannot reach a final state) are always computed by a backward
+            search and excluded from iteration, regardless of `precompute`. The search takes one pass over the edges
+            and also excludes the non-final states without choices, which value iteration cannot update.
+        * `timeout`, `cancel`, `progress`, `budget`: See `runutils`.
+    """
+    METHOD_JACOBI = "jacobi"
+    METHOD_GAUSS_SEIDEL = "gauss-seidel"
+    METHOD_TOPOLOGICAL = "topological"
+
+    def __init__(self, model, final, **kwargs):
+        # Input parameters:
+        self._model = model
+        self._final = set(final)
+
+        # Solver parameters:
+        self._is_solved = False
+        self._method = kwargs.get("method", MaxReachProb.METHOD_JACOBI)
+        self._tol = kwargs.get("tol", 1e-6)
+        self._max_iter = kwargs.get("max_iter", None)
+        self._precompute = kwargs.get("precompute", True)
+        self._budget = runutils.Budget.from_kwargs(kwargs)
+        self._owns_budget = kwargs.get("budget", None) is None
+
+        # Output parameters:
+        #   `value` holds the maximum reachability probability of every dense node id of `index`.
+        #   `prob0` and `prob1` are boolean masks of the states with probability 0 and 1 found before iteration.
+        #   Without precomputation, `prob1` holds only the final states.
+        self.index = graphutils.graph_index(model)
+        self.value = None
+        self.prob0 = None
+        self.prob1 = None
+        self.iterations = 0
+        self._values = None
+
+    @property
+    def values(self):
+        """ Map of states to their maximum reachability probability. """
+        if self._values is None:
+            self._values = dict(zip(self.index.nodes, self.value.tolist()))
+        return self._values
+
+    def probability(self, state):
+        """ Maximum probability of reaching the final states from `state`. """
+        return float(self.value[self.index.node_id[state]])
+
+    def solve(self, force=False):
+        # If game is solved and `force` is False, then warn the user.
+        if self._is_solved and not force:
+            logger.warning(f"Game is solved. To solve again, call `solve(force=True)`.")
+            return
+
+        assert self._method in (MaxReachProb.METHOD_JACOBI, MaxReachProb.METHOD_GAUSS_SEIDEL,
+                                MaxReachProb.METHOD_TOPOLOGICAL), f"Unknown value iteration method: {self._method}."
+
+        # Until the values are recomputed, the MDP is unsolved. A cancelled solve leaves it unsolved.
+        self._is_solved = False
+
+        # Start the deadline, unless the budget is shared with (and started by) a caller.
+        if self._owns_budget:
+            self._budget.start()
+
+        index = self.index
+        choice, choice_state = index.choice, index.choice_state
+        is_final = index.mask(u for u in self._final if u in index.node_id)
+        is_choice = ~is_final[choice_state]
+
+        # Transition matrix: one row per choice. Parallel edges of a choice are summed.
+        if index.probability is not None:
+            prob = index.probability
+        elif isinstance(self._model, nx.MultiDiGraph):
+            prob = np.fromiter(
+                (self._model.edges[edge].get("probability", np.nan) for edge in index.edges),
+                dtype=np.float64,
+                count=index.num_edges
+            )
+        else:
+            prob = np.full(index.num_edges, np.nan)
+        if np.isnan(prob).any():
+            raise ValueError("mdp.MaxReachProb expects every edge to have a `probability` attribute.")
+        matrix = scipy.sparse.csr_matrix((prob, (choice, index.dst)), shape=(len(choice_state), index.num_nodes))
+
+        # States that cannot reach a final state have probability 0 (always computed).
+        # Precomputation: almost-sure winning states have probability 1.
+        self.prob0 = ~graphutils.backward_reachable(index, is_final, is_choice[choice])
+        if self._precompute:
+            sol = ASWinReach(self.index, self._final, solver=ASWinReach.SOLV_COUNTER, budget=self._budget)
+            sol.solve()
+            self.prob1 = sol.win_mask[ASWinReach.PLAYER1] | is_final
+        else:
+            self.prob1 = is_final.copy()
+
+        self.value = self.prob1.astype(np.float64)
+        self._values = None
+        unknown = ~self.prob0 & ~self.prob1
+        if self._method == MaxReachProb.METHOD_TOPOLOGICAL:
+            self.iterations = self._solve_topological(matrix, unknown)
+        elif self._method == MaxReachProb.METHOD_GAUSS_SEIDEL:
+            self.iterations = self._solve_gauss_seidel(matrix, unknown)
+        else:
+            self.iterations = self._iterate(matrix, unknown)
+
+        # Mark the game to be solved
+        self._is_solved = True
+
+    def _iterate(self, matrix, states, iteration=0):
+        """
+        Jacobi value iteration over the states selected by mask `states`. Values of other states are fixed.
+        Every state in `states` must have at least one choice.
+
+        :return: (int) Iteration count after convergence, continuing from `iteration`.
+        """
+        choice_state = self.index.choice_state
+        rows = np.flatnonzero(states[choice_state])
+        if len(rows) == 0:
+            return iteration
+
+        # Choices are sorted by state, so the choices of every state are contiguous.
+        sub = matrix[rows]
+        targets = choice_state[rows]
+        starts = np.flatnonzero(np.r_[True, targets[1:] != targets[:-1]])
+        targets = targets[starts]
+        while self._max_iter is None or iteration < self._max_iter:
+            new = np.maximum.reduceat(sub @ self.value, starts)
+            delta = np.abs(new - self.value[targets])
+            self.value[targets] = new
+            iteration += 1
+            changed = int(np.count_nonzero(delta > self._tol))
+            self._budget.step(iteration, changed)
+            if changed == 0:
+                break
+        return iteration
+
+    def _solve_gauss_seidel(self, matrix, unknown):
+        index = self.index
+        choice_state = index.choice_state
+
+        # Choices of every unknown state as lists of (successor ids, probabilities).
+        choices = {int(uid): [] for uid in np.flatnonzero(unknown)}
+        for c in np.flatnonzero(unknown[choice_state]).tolist():
+            row = slice(matrix.indptr[c], matrix.indptr[c + 1])
+            choices[int(choice_state[c])].append((matrix.indices[row], matrix.data[row]))
+
+        value = self.value
+        iteration = 0
+        while self._max_iter is None or iteration < self._max_iter:
+            changed = 0
+            for uid, acts in choices.items():
+                new = max(float(np.dot(probs, value[succ])) for succ, probs in acts)
+                if abs(new - value[uid]) > self._tol:
+                    changed += 1
+                value[uid] = new
+            iteration += 1
+            self._budget.step(iteration, changed)
+            if changed == 0:
+                break
+        return iteration
+
+    def _solve_topological(self, matrix, unknown):
+        index = self.index
+        is_edge = unknown[index.src] & unknown[index.dst]
+        src, dst = index.src[is_edge], index.dst[is_edge]
+
+        # SCCs of the unknown states and their height in the SCC graph (0 for bottom SCCs).
+        num_comp, comp = csgraph.connected_components(
+            scipy.sparse.csr_matrix(
+                (np.ones(len(src), dtype=np.int8), (src, dst)),
+                shape=(index.num_nodes, index.num_nodes)
+            ),
+            directed=True,
+            connection="strong"
+        )
+        pairs = np.unique(np.stack([comp[src], comp[dst]]).astype(np.int64), axis=1)
+        pairs = pairs[:, pairs[0] != pairs[1]]
+        counter = np.bincount(pairs[0], minlength=num_comp)
+        pred_ptr = np.searchsorted(np.sort(pairs[1]), np.arange(num_comp + 1))
+        pred = pairs[0][np.argsort(pairs[1], kind="stable")]
+        height = np.zeros(num_comp, dtype=np.int64)
+        queue = np.flatnonzero(counter == 0).tolist()
+        for c in queue:
+            for p in pred[pred_ptr[c]:pred_ptr[c + 1]].tolist():
+                height[p] = max(height[p], height[c] + 1)
+                counter[p] -= 1
+                if counter[p] == 0:
+                    queue.append(p)
+
+        # Solve the SCCs of every height, bottom-up. Values of lower SCCs are final.
+        height = np.where(unknown, height[comp], -1)
+        iteration = 0
+        for level in range(int(height.max(initial=-1)) + 1):
+            iteration = self._iterate(matrix, height == level, iteration)
+        return iteration
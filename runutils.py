@@ -0,0 +1,76 @@
+"""
+Cooperative cancellation, deadlines and progress reporting for solvers.
+
+Solvers accept the keyword arguments:
+    * `timeout`: (float) Seconds after which the solve is abandoned.
+    * `cancel`: (threading.Event | callable) The solve is abandoned once the event is set or the callable returns True.
+    * `progress`: (callable) Called as `progress(level, frontier)` after every level (iteration) of a solver,
+        with the level number and the number of states added in that level.
+    * `budget`: (Budget) A budget shared with other solves, e.g., the sub-games of DSWinReach.
+        Overrides the other three arguments. Its deadline is not restarted by the solver.
+
+An abandoned solve raises `SolveCancelled` and leaves the solver unsolved.
+"""
+
+import time
+
+
+class SolveCancelled(Exception):
+    """ Raised by a solver when its solve is cancelled or its deadline has passed. """
+    pass
+
+
+class Budget:
+    def __init__(self, timeout=None, cancel=None, progress=None):
+        """
+        Deadline, cancellation flag and progress callback of one or more solves.
+
+        :param timeout: (float) Seconds from now (or from `start`) after which `check` raises `SolveCancelled`.
+            Default: None.
+        :param cancel: (threading.Event | callable) Cancellation flag. Default: None.
+        :param progress: (callable) Progress callback `progress(level, frontier)`. Default: None.
+        """
+        self.timeout = timeout
+        self.cancel = cancel
+        self.progress = progress
+        self.deadline = None
+        self.start()
+
+    @staticmethod
+    def from_kwargs(kwargs):
+        """ Returns the `budget` in solver kwargs, or a new budget from `timeout`, `cancel` and `progress`. """
+        if kwargs.get("budget", None) is not None:
+            return kwargs["budget"]
+        return Budget(
+            timeout=kwargs.get("timeout", None),
+            cancel=kwargs.get("cancel", None),
+            progress=kwargs.get("progress", None)
+        )
+
+    def start(self):
+        """ (Re)starts the deadline. Solvers call it when they start a solve with a budget of their own. """
+        self.deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+    def remaining(self):
+        """ Seconds left until the deadline, or None if there is no deadline. """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def is_cancelled(self):
+        """ True if the cancellation flag is set or the deadline has passed. """
+        if self.cancel is not None:
+            if self.cancel.is_set() if hasattr(self.cancel, "is_set") else self.cancel():
+                return True
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def check(self):
+        """ Raises `SolveCancelled` if the solve should be abandoned. """
+        if self.is_cancelled():
+            raise SolveCancelled("Solve cancelled." if self.remaining() != 0.0 else "Solve exceeded its time budget.")
+
+    def step(self, level, frontier):
+        """ Reports progress of a solver after a level with `frontier` new states, then calls `check`. """
+        if self.progress is not None:
+            self.progress(level, frontier)
+        self.check()
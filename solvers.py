@@ -1,6 +1,9 @@
 import dtptb
+import graphutils
 import mdp
 import networkx as nx
+import numpy as np
+import runutils
 from loguru import logger
 
 
@@ -11,6 +14,14 @@ class DecoyAllocator:
     ENUMERATIVE = "enumerative"
 
     def __init__(self, p1game, true_final, n_traps, n_fakes, candidates, sol_concept=SWin, approach=GREEDY, **kwargs):
+        # Restrict game to states reachable from initial states. Candidates keep only their reachable states.
+        init_states = kwargs.get("init_states", None)
+        if init_states is not None:
+            p1game = graphutils.restrict(p1game, init_states)
+            true_final = {u for u in true_final if p1game.has_node(u)}
+            candidates = {c: {u for u in nodes if p1game.has_node(u)} for c, nodes in candidates.items()}
+            candidates = {c: nodes for c, nodes in candidates.items() if len(nodes) > 0}
+
         # Parameters needed for generating solution
         self._p1game = p1game
         self._true_final = true_final
@@ -77,6 +88,14 @@ class DecoyAllocator:
         # logger.info(f"Candidate Decoys: {set(candidate2nodes.keys())} ")
         logger.info(f"Initializing candidate decoys: {set(self._candidates.keys())} ")
 
+        # Base game does not depend on decoys. Solve it once and share it among all candidates.
+        if self._base_game_sol is None:
+            self._base_game_sol = solve_base_game(self._p1game, self._true_final)
+
+        # P2's game of the allocated fakes. Its final states only grow, so it is updated incrementally.
+        fake_nodes = set.union(set(), *[self._candidates[fake] for fake in fakes])
+        p2_game_sol = solve_p2game(self._p1game, self._true_final, fake_nodes)
+
         # 1. ALLOCATE FAKES
         iter_count = len(fakes)
         self._data = dict()
@@ -96,9 +115,24 @@ class DecoyAllocator:
             best_fake = None
             best_vod = 0.0
             fake_nodes = set.union(set(), *[self._candidates[fake] for fake in fakes])
-            for candidate in potential_decoys:
+
+            # P2's games of all candidates differ only in final states. Solve them in one batch.
+            potential_decoys = list(potential_decoys)
+            p2_game_sols = dtptb.solve_batch(
+                self._p1game,
+                [self._true_final | fake_nodes | self._candidates[candidate] for candidate in potential_decoys],
+                player=2
+            )
+            for candidate, candidate_p2_game_sol in zip(potential_decoys, p2_game_sols):
                 # Compute deceptive almost-sure winning region
-                win = solver(self._p1game, final=self._true_final, traps=set(), fakes=fake_nodes | self._candidates[candidate])
+                win = solver(
+                    self._p1game,
+                    final=self._true_final,
+                    traps=set(),
+                    fakes=fake_nodes | self._candidates[candidate],
+                    base_game_sol=self._base_game_sol,
+                    p2_game_sol=candidate_p2_game_sol
+                )
                 win.solve()
 
                 # Update data
@@ -115,6 +149,8 @@ class DecoyAllocator:
 
             # intermediate_vod_fakes.append(iteration_vod_map)
             fakes.add(best_fake)
+            if best_fake is not None:
+                p2_game_sol.add_targets(self._candidates[best_fake])
             self._best_decoys[iter_count] = (best_fake, best_vod)
             logger.info(f"Selected {best_fake} for fake no. {iter_count}: fakes={fakes} and traps={traps}. Resulting VoD: {best_vod}")
 
@@ -136,13 +172,17 @@ class DecoyAllocator:
             best_vod = 0.0
             fake_nodes = set.union(set(), *[self._candidates[fake] for fake in fakes])
             trap_nodes = set.union(set(), *[self._candidates[trap] for trap in traps])
+
+            # Traps do not change P2's game. It is shared among all candidates.
             for candidate in potential_decoys:
                 # Compute deceptive almost-sure winning region
                 win = solver(
                     self._p1game,
                     final=self._true_final,
                     traps=trap_nodes | self._candidates[candidate],
-                    fakes=fake_nodes
+                    fakes=fake_nodes,
+                    base_game_sol=self._base_game_sol,
+                    p2_game_sol=p2_game_sol
                 )
                 win.solve()
 
@@ -167,7 +207,7 @@ class DecoyAllocator:
 
 
 class DSWinReach:
-    def __init__(self, base_game_graph, final, traps, fakes, base_game_sol=None):
+    def __init__(self, base_game_graph, final, traps, fakes, base_game_sol=None, **kwargs):
         """
         Computes deceptive sure winning region for P1 in a reachability game.
 
@@ -176,48 +216,85 @@ class DSWinReach:
         :param traps: Set of states allocated as traps.
         :param fakes: Set of states allocated as fakes.
         :param base_game_sol: Solution of P2 game. If None, then P2's game will be constructed and solved.
+        :param init_states: (iterable) If provided, the analysis and VoD are restricted to the states reachable from
+            the given initial states (e.g., `base_game_graph.graph["init_states"]`). Default: None.
+        :param p2_game_sol: (dtptb.SWinReach) Solution of P2's game on `base_game_graph` with final states
+            `final | fakes`, e.g., from `dtptb.solve_batch`. If None, then P2's game will be solved. Default: None.
+        :param timeout, cancel, progress, budget: Time budget, cancellation and progress reporting of `solve`,
+            shared by all games solved in it (see `runutils`).
 
         :note: `final, traps, fakes` are nodes in base_game_graph
         """
+        # Restrict base game to states reachable from initial states.
+        init_states = kwargs.get("init_states", None)
+        if init_states is not None:
+            base_game_graph = graphutils.restrict(base_game_graph, init_states)
+            final = {u for u in final if base_game_graph.has_node(u)}
+            traps = {u for u in traps if base_game_graph.has_node(u)}
+            fakes = {u for u in fakes if base_game_graph.has_node(u)}
+            if base_game_sol is not None:
+                logger.warning("Ignoring `base_game_sol`: base game is restricted to states reachable from `init_states`.")
+                base_game_sol = None
+            if kwargs.get("p2_game_sol", None) is not None:
+                logger.warning("Ignoring `p2_game_sol`: base game is restricted to states reachable from `init_states`.")
+                kwargs["p2_game_sol"] = None
+
         # Input parameters:
         self.graph = base_game_graph
         self.final = final
         self.traps = traps
         self.fakes = fakes
         self.base_game_sol = base_game_sol
-        self.p2_game_sol = None
+        self.p2_game_sol = kwargs.get("p2_game_sol", None)
         self.hypergame = None
         self.hypergame_sol = None
 
         # Solver parameters:
         self._is_solved = False
+        self._budget = runutils.Budget.from_kwargs(kwargs)
+        self._owns_budget = kwargs.get("budget", None) is None
 
         # Output parameters:
+        #   `rank` (int32) and `win_mask` (bool) are arrays over the dense node ids of the base game graph.
+        #   `winning_nodes` is derived from them on first access.
         self.vod = None
         self.sr_acts = None
-        self.winning_nodes = {1: set(), 2: set()}
-        self.winning_edges = {1: set(), 2: set()}
+        self.rank = None
+        self.win_mask = None
+        self._winning_nodes = None
+
+    @property
+    def winning_nodes(self):
+        """ Map of player to the set of states winning for that player. """
+        if self.win_mask is None:
+            return {1: set(), 2: set()}
+        if self._winning_nodes is None:
+            index = graphutils.graph_index(self.graph)
+            self._winning_nodes = {p: index.nodes_of(mask) for p, mask in self.win_mask.items()}
+        return self._winning_nodes
+
+    @property
+    def winning_edges(self):
+        """ Map of player to the set of hypergame edges winning for that player. Derived from the hypergame solution. """
+        if self.win_mask is None:
+            return {1: set(), 2: set()}
+        return {1: self.hypergame_sol.winning_edges[1], 2: None}
 
     def gen_sr_acts(self):
         """
         Assume: P2's game is solved.
         :return: (dict) A map of states to SR actions.
         """
-        # Construct a rank dictionary.
-        rank = {state: level for level, states in self.p2_game_sol.level_set.items() for state in states}
-        for state in self.p2_game_sol.winning_nodes[1]:
-            rank[state] = float("inf")
+        # Rank array of P2's game. States winning for P1 have rank `RANK_INF`.
+        index = self.p2_game_sol.index
+        rank = self.p2_game_sol.rank
+        win2 = self.p2_game_sol.win_mask[2]
 
         # Use SRActs definition before Def. 8 in paper to construct SRActs.
-        sr_acts = dict()
-        for state in self.p2_game_sol.winning_nodes[2]:
-            sr_acts[state] = set()
-            for _, next_state, action in self.graph.out_edges(state, keys=True):
-                if rank[next_state] < rank[state]:
-                    sr_acts[state].add(action)
+        is_sr = win2[index.src] & (rank[index.dst] < rank[index.src])
 
         # Return SRActs.
-        return sr_acts
+        return index.actions_of(is_sr, win2)
 
     def construct_hypergame(self, sr_acts):
         hgame = nx.MultiDiGraph()
@@ -255,13 +332,21 @@ class DSWinReach:
                 logger.warning(f"Game is solved. To solve again, call `solve(force=True)`.")
             return
 
+        # Until the solution is recomputed, the game is unsolved. A cancelled solve leaves it unsolved.
+        self._is_solved = False
+
+        # Start the deadline, unless the budget is shared with (and started by) a caller.
+        if self._owns_budget:
+            self._budget.start()
+
         # If Base game is not solved, then solve it.
         logger.debug("Solving base game.")
         if self.base_game_sol is None:
-            self.base_game_sol = solve_base_game(self.graph, self.final)
+            self.base_game_sol = solve_base_game(self.graph, self.final, budget=self._budget)
 
         # If P2's game is not solved, then solve it.
-        self.p2_game_sol = solve_p2game(self.graph, self.final, self.fakes)
+        if self.p2_game_sol is None:
+            self.p2_game_sol = solve_p2game(self.graph, self.final, self.fakes, budget=self._budget)
 
         # Determine subjectively rationalizable actions for P2.
         self.sr_acts = self.gen_sr_acts()
@@ -276,25 +361,40 @@ class DSWinReach:
             )
             p1_final = set.intersection(p1_final, set(self.hypergame.nodes()))
 
-        self.hypergame_sol = dtptb.SWinReach(self.hypergame, final=p1_final, player=1)
+        self.hypergame_sol = dtptb.SWinReach(
+            self.hypergame,
+            final=p1_final,
+            player=1,
+            solver=dtptb.SWinReach.COUNTER,
+            budget=self._budget
+        )
         self.hypergame_sol.solve()
-        logger.debug(f"Hypergame: \nNodes:{self.hypergame.nodes(data=True)}, \nEdges:{self.hypergame.edges(keys=True)}")
-        logger.debug(
-            f"Base game solved. "
-            f"\nFinal: {p1_final}."
-            f"\nWinning nodes P2: {self.hypergame_sol.winning_nodes[2]}."
-            f"\nWinning nodes P1: {self.hypergame_sol.winning_nodes[1]}."
+        logger.opt(lazy=True).debug(
+            "Hypergame: \nNodes:{}, \nEdges:{}",
+            lambda: self.hypergame.nodes(data=True),
+            lambda: self.hypergame.edges(keys=True)
+        )
+        logger.opt(lazy=True).debug(
+            "Base game solved. \nFinal: {}. \nWinning nodes P2: {}. \nWinning nodes P1: {}.",
+            lambda: p1_final,
+            lambda: self.hypergame_sol.winning_nodes[2],
+            lambda: self.hypergame_sol.winning_nodes[1]
         )
 
         # Save solutions
-        self.winning_nodes[1] = self.hypergame_sol.winning_nodes[1]
-        self.winning_nodes[2] = self.hypergame_sol.winning_nodes[2]
-        self.winning_edges[1] = self.hypergame_sol.winning_edges[1]
-        self.winning_edges[2] = None
+        #   Hypergame states are states of the base game. Map their ranks and masks to base game node ids.
+        index = graphutils.graph_index(self.graph)
+        hgame_ids = index.ids(self.hypergame_sol.index.nodes)
+        self.rank = np.full(index.num_nodes, dtptb.SWinReach.RANK_INF, dtype=np.int32)
+        self.rank[hgame_ids] = self.hypergame_sol.rank
+        self.win_mask = {p: np.zeros(index.num_nodes, dtype=bool) for p in (1, 2)}
+        for p in (1, 2):
+            self.win_mask[p][hgame_ids] = self.hypergame_sol.win_mask[p]
+        self._winning_nodes = None
 
         # Compute value of deception.
         try:
-            self.vod = len(self.winning_nodes[1]) / (self.hypergame.number_of_nodes() - len(self.final))
+            self.vod = int(np.count_nonzero(self.win_mask[1])) / (self.hypergame.number_of_nodes() - len(self.final))
         except ZeroDivisionError:
             self.vod = 0
         logger.info(f"Value of deception: {self.vod}")
@@ -304,7 +404,10 @@ class DSWinReach:
 
 
 class DASWinReach:
-    def __init__(self, base_game_graph, final, traps, fakes, base_game_sol=None):
+    SOLV_PROJECTION = "projection"
+    SOLV_DIRECT = "direct"
+
+    def __init__(self, base_game_graph, final, traps, fakes, base_game_sol=None, **kwargs):
         """
         Computes deceptive sure winning region for P1 in a reachability game.
 
@@ -313,27 +416,81 @@ class DASWinReach:
         :param traps: Set of states allocated as traps.
         :param fakes: Set of states allocated as fakes.
         :param base_game_sol: Solution of P2 game. If None, then P2's game will be constructed and solved.
+        :param init_states: (iterable) If provided, the analysis and VoD are restricted to the states reachable from
+            the given initial states (e.g., `base_game_graph.graph["init_states"]`). Default: None.
+        :param p2_game_sol: (dtptb.SWinReach) Solution of P2's game on `base_game_graph` with final states
+            `final | fakes`, e.g., from `dtptb.solve_batch`. If None, then P2's game will be solved. Default: None.
+        :param timeout, cancel, progress, budget: Time budget, cancellation and progress reporting of `solve`,
+            shared by all games solved in it (see `runutils`).
+        :param solver: (str) `SOLV_DIRECT` computes DASWin on the base game graph (see `solve_direct`).
+            `SOLV_PROJECTION` solves the hypergame of `construct_hypergame` and maps the result back.
+            Both give the same DASWin region. Default: `SOLV_DIRECT`.
 
         :note: `final, traps, fakes` are nodes in base_game_graph
         """
+        # Restrict base game to states reachable from initial states.
+        init_states = kwargs.get("init_states", None)
+        if init_states is not None:
+            base_game_graph = graphutils.restrict(base_game_graph, init_states)
+            final = {u for u in final if base_game_graph.has_node(u)}
+            traps = {u for u in traps if base_game_graph.has_node(u)}
+            fakes = {u for u in fakes if base_game_graph.has_node(u)}
+            if base_game_sol is not None:
+                logger.warning("Ignoring `base_game_sol`: base game is restricted to states reachable from `init_states`.")
+                base_game_sol = None
+            if kwargs.get("p2_game_sol", None) is not None:
+                logger.warning("Ignoring `p2_game_sol`: base game is restricted to states reachable from `init_states`.")
+                kwargs["p2_game_sol"] = None
+
         # Input parameters:
         self.graph = base_game_graph
         self.final = final
         self.traps = traps
         self.fakes = fakes
         self.base_game_sol = base_game_sol
-        self.p2_game_sol = None
-        self.hypergame = None
-        self.hypergame_sol = None
+        self.p2_game_sol = kwargs.get("p2_game_sol", None)
+        self._hypergame = None
+        self._hypergame_sol = None
 
         # Solver parameters:
         self._is_solved = False
+        self._solver = kwargs.get("solver", DASWinReach.SOLV_DIRECT)
+        self._budget = runutils.Budget.from_kwargs(kwargs)
+        self._owns_budget = kwargs.get("budget", None) is None
 
         # Output parameters:
+        #   `win_mask` holds boolean arrays over the dense node ids of the base game graph.
+        #   `winning_nodes` is derived from it on first access.
         self.vod = None
         self.sr_acts = None
-        self.winning_nodes = {1: set(), 2: set()}
+        self.win_mask = None
         self.winning_edges = {1: set(), 2: set()}
+        self._winning_nodes = None
+
+    @property
+    def winning_nodes(self):
+        """ Map of player to the set of states winning for that player. """
+        if self.win_mask is None:
+            return {1: set(), 2: set()}
+        if self._winning_nodes is None:
+            index = graphutils.graph_index(self.graph)
+            self._winning_nodes = {p: index.nodes_of(mask) for p, mask in self.win_mask.items()}
+        return self._winning_nodes
+
+    @property
+    def hypergame(self):
+        """ Hypergame of `construct_hypergame`. If `solve` did not construct it, it is constructed on first access. """
+        if self._hypergame is None and self.sr_acts is not None:
+            self._hypergame = self.construct_hypergame(self.sr_acts)
+        return self._hypergame
+
+    @property
+    def hypergame_sol(self):
+        """ Solution of the hypergame. If `solve` did not solve the hypergame, it is solved on first access. """
+        if self._hypergame_sol is None and self.hypergame is not None:
+            self._hypergame_sol = mdp.ASWinReach(self.hypergame, final={"qF"}, solver=mdp.ASWinReach.SOLV_COUNTER)
+            self._hypergame_sol.solve()
+        return self._hypergame_sol
 
     def gen_sr_acts(self):
         """
@@ -341,18 +498,12 @@ class DASWinReach:
         :return: (dict) A map of states to SR actions.
         """
         # Use SRActs definition in Sect. 4.5 to construct SRActs.
-        sr_acts = dict()
-        win2 = self.p2_game_sol.winning_nodes[2]
-        for state in win2:
-            sr_acts[state] = set()
-            if state in self.final:
-                continue
-            for _, next_state, action in self.graph.out_edges(state, keys=True):
-                if next_state in win2:
-                    sr_acts[state].add(action)
+        index = self.p2_game_sol.index
+        win2 = self.p2_game_sol.win_mask[2]
+        is_sr = win2[index.src] & ~index.mask(self.final)[index.src] & win2[index.dst]
 
         # Return SRActs.
-        return sr_acts
+        return index.actions_of(is_sr, win2)
 
     def construct_hypergame(self, sr_acts):
         """
@@ -372,15 +523,27 @@ class DASWinReach:
         3. Introduce a single sink state `sink`. Any transition reaching a final state in base game is redirected to `sink`.
         3. Introduce a single final state `qF`. Any transition reaching a decoy state in P1's game is redirected to `qF`.
         3. Introduce a single final state `p1win`. Any SRAct that leads to P1's winning region in base game is redirected to `p1win`.
+
+        :note: If a P1 state has several out-edges with the same SR action, every one of them contributes its
+            transitions. The former construction, which scanned the out-edges of every state, used only the first
+            of them. Both coincide on games in which every action of a state has a single successor.
         """
         # Initialize a MDP graph.
         hgame = nx.MultiDiGraph()
 
+        # The two-step transitions of the base game are precomputed once per base game graph.
+        # Projection only filters them using masks over base game states and edges.
+        index = graphutils.graph_index(self.graph)
+        macro = index.macro
+        nodes, keys = index.nodes, index.keys
+        step_src, step_mid, step_edge = macro.step_src.tolist(), macro.step_mid.tolist(), macro.step_edge.tolist()
+        is_final = index.mask(self.final)
+        is_decoy = index.mask(self.traps | self.fakes)
+        is_sr = index.action_mask(sr_acts)
+        is_state = index.mask(self.base_game_sol.winning_nodes[2]) & (index.turn == 1) & ~is_final & ~is_decoy
+
         # Add states to hypergame.
-        hgame.add_nodes_from((
-            u for u in self.base_game_sol.winning_nodes[2]
-            if u not in self.final | self.fakes | self.traps and self.graph.nodes[u]["turn"] == 1
-        ))
+        hgame.add_nodes_from(nodes[i] for i in np.flatnonzero(is_state).tolist())
 
         # hgame.add_node("qF", turn=1, label={"final"})
         # hgame.add_node("sink", turn=1, label={"sink"})
@@ -388,59 +551,58 @@ class DASWinReach:
         hgame.add_node("sink")
         hgame.add_node("p1win")
 
-        # Add edges to hypergame.
-        for u in hgame.nodes():
-            # If u is final or decoy, it is sink. Self-edges at sink states are added outside this loop.
-            if u == "qF" or u == "sink" or u == "p1win":
-                continue
-
-            # For each SR action of u, add a transition to the next state, if applicable.
-            for a in sr_acts[u]:
-                # Identify next state
-                out_edges_u = self.graph.out_edges(u, keys=True)
-                v = next(v for _, v, a_ in out_edges_u if a_ == a)
-
-                # If the next state is decoy, redirect to qF.
-                # If the next state is a final state in base game, redirect to sink.
-                # Else, add transitions to successors of the next state.
-                if v in self.traps | self.fakes:
-                    hgame.add_edge(u, "qF", key=a)
-                elif v in self.final:
-                    hgame.add_edge(u, "sink", key=a)
-                else:
-                    # Get successors of v
-                    successors_v = {v_ for _, v_, a_ in self.graph.out_edges(v, keys=True) if a_ in sr_acts[v]}
-
-                    # Process each successor
-                    for u_prime in successors_v:
-                        # If u_prime is not in hypergame, then skip.
-                        if u_prime not in hgame.nodes() and u_prime not in self.final | self.traps | self.fakes:
-                            logger.warning(
-                                f"Spurious transition: T({u}, {a}) -> {v}. State {v} is not in hypergame, but is reached under SRActs."
-                            )
-                            continue
-
-                        # If u_prime is not P1 state, then skip. Warn that assumptions are violated.
-                        # Assume 1. v must have at least one neighbor.
-                        # Assume 2. u_prime is P1 state.
-                        if self.graph.nodes[u_prime]["turn"] == 2:
-                            logger.error(
-                                f"Assumption violated: Base game is does not alternate turns. "
-                                f"Spurious Transition T({v}, ??) -> {u_prime}, where {v}, {u_prime} are P2 states."
-                            )
-                            continue
-
-                        if u_prime in self.traps | self.fakes:
-                            hgame.add_edge(u, "qF", key=a)
-                        elif u_prime in self.final:
-                            hgame.add_edge(u, "sink", key=a)
-                        else:
-                            hgame.add_edge(u, u_prime, key=a)
-
-            # Mark `qF` as sink.
-            hgame.add_edge("qF", "qF", key="*")
-            hgame.add_edge("sink", "sink", key="*")
-            hgame.add_edge("p1win", "p1win", key="*")
+        # Steps (u, a) -> v for every SR action a of every state u in hypergame.
+        steps = np.flatnonzero(is_state[macro.step_src] & is_sr[macro.step_edge])
+        mid = macro.step_mid[steps]
+
+        # If the next state is decoy, redirect to qF.
+        # If the next state is a final state in base game, redirect to sink.
+        edges = [(nodes[step_src[i]], "qF", keys[step_edge[i]], {}) for i in steps[is_decoy[mid]].tolist()]
+        edges += [
+            (nodes[step_src[i]], "sink", keys[step_edge[i]], {})
+            for i in steps[~is_decoy[mid] & is_final[mid]].tolist()
+        ]
+
+        # Else, add transitions to SR successors of the next state.
+        step, hop = macro.hops(steps[~is_decoy[mid] & ~is_final[mid]])
+        step, hop = step[is_sr[hop]], hop[is_sr[hop]]
+        step, u_prime = np.unique(np.stack([step, index.dst[hop]]), axis=1)
+
+        # If u_prime is not in hypergame, then skip.
+        is_spurious = ~is_state[u_prime] & ~is_final[u_prime] & ~is_decoy[u_prime]
+        for i in step[is_spurious].tolist():
+            u, a, v = nodes[step_src[i]], keys[step_edge[i]], nodes[step_mid[i]]
+            logger.warning(
+                f"Spurious transition: T({u}, {a}) -> {v}. State {v} is not in hypergame, but is reached under SRActs."
+            )
+
+        # If u_prime is not P1 state, then skip. Warn that assumptions are violated.
+        # Assume 1. v must have at least one neighbor.
+        # Assume 2. u_prime is P1 state.
+        is_p2 = ~is_spurious & (index.turn[u_prime] == 2)
+        for i, j in zip(step[is_p2].tolist(), u_prime[is_p2].tolist()):
+            v = nodes[step_mid[i]]
+            logger.error(
+                f"Assumption violated: Base game is does not alternate turns. "
+                f"Spurious Transition T({v}, ??) -> {nodes[j]}, where {v}, {nodes[j]} are P2 states."
+            )
+
+        is_valid = ~is_spurious & ~is_p2
+        step, u_prime = step[is_valid], u_prime[is_valid]
+        for i, j in zip(step.tolist(), u_prime.tolist()):
+            if is_decoy[j]:
+                target = "qF"
+            elif is_final[j]:
+                target = "sink"
+            else:
+                target = nodes[j]
+            edges.append((nodes[step_src[i]], target, keys[step_edge[i]], {}))
+        hgame.add_edges_from(edges)
+
+        # Mark `qF` as sink.
+        hgame.add_edge("qF", "qF", key="*")
+        hgame.add_edge("sink", "sink", key="*")
+        hgame.add_edge("p1win", "p1win", key="*")
 
         # Return hypergame.
         return hgame
@@ -477,36 +639,57 @@ class DASWinReach:
                 logger.warning(f"Game is solved. To solve again, call `solve(force=True)`.")
             return
 
+        # Until the solution is recomputed, the game is unsolved. A cancelled solve leaves it unsolved.
+        self._is_solved = False
+
+        # Start the deadline, unless the budget is shared with (and started by) a caller.
+        if self._owns_budget:
+            self._budget.start()
+
         # If Base game is not solved, then solve it.
         logger.debug("Solving base game.")
         if self.base_game_sol is None:
-            self.base_game_sol = solve_base_game(self.graph, self.final)
+            self.base_game_sol = solve_base_game(self.graph, self.final, budget=self._budget)
 
         # If P2's game is not solved, then solve it.
-        self.p2_game_sol = solve_p2game(self.graph, self.final, self.fakes)
+        if self.p2_game_sol is None:
+            self.p2_game_sol = solve_p2game(self.graph, self.final, self.fakes, budget=self._budget)
 
         # Determine subjectively rationalizable actions for P2.
         self.sr_acts = self.gen_sr_acts()
 
-        # Construct hypergame.
-        self.hypergame = self.construct_hypergame(self.sr_acts)
-        p1_final = {"qF"}
-        self.hypergame_sol = mdp.ASWinReach(self.hypergame, final=p1_final)
-        self.hypergame_sol.solve()
-        logger.debug(
-            f"Hypergame solved. "
-            f"\nFinal: {p1_final}."
-            f"\nWinning nodes P1: {self.hypergame_sol.winning_nodes[1]}."
-        )
+        index = graphutils.graph_index(self.graph)
+        self._hypergame = None
+        self._hypergame_sol = None
+        if self._solver == DASWinReach.SOLV_PROJECTION:
+            # Construct hypergame.
+            self._hypergame = self.construct_hypergame(self.sr_acts)
+            p1_final = {"qF"}
+            self._hypergame_sol = mdp.ASWinReach(
+                self._hypergame,
+                final=p1_final,
+                solver=mdp.ASWinReach.SOLV_COUNTER,
+                budget=self._budget
+            )
+            self._hypergame_sol.solve()
+            logger.opt(lazy=True).debug(
+                "Hypergame solved. \nFinal: {}. \nWinning nodes P1: {}.",
+                lambda: p1_final,
+                lambda: self._hypergame_sol.winning_nodes[1]
+            )
 
-        # Determine P1's DASWin region by inverting the transformation to MDP.
-        self.winning_nodes[1] = self.invert_projection(self.hypergame_sol, self.sr_acts)
-        logger.debug(f"Hypergame: \nNodes:{self.hypergame.nodes(data=True)}, \nEdges:{self.hypergame.edges(keys=True)}")
-        logger.debug(
-            f"Hypergame solved. "
-            f"\nFinal: {p1_final}."
-            f"\nWinning nodes P1: {self.hypergame_sol.winning_nodes[1]}."
-        )
+            # Determine P1's DASWin region by inverting the transformation to MDP.
+            is_daswin = self.invert_projection(self._hypergame_sol, self.sr_acts)
+            logger.opt(lazy=True).debug(
+                "Hypergame: \nNodes:{}, \nEdges:{}",
+                lambda: self._hypergame.nodes(data=True),
+                lambda: self._hypergame.edges(keys=True)
+            )
+        else:
+            is_daswin = self.solve_direct(self.sr_acts)
+
+        self.win_mask = {1: is_daswin, 2: np.zeros(index.num_nodes, dtype=bool)}
+        self._winning_nodes = None
         # # Save solutions
         # self.winning_nodes[1] = hypergame_sol.winning_nodes[1]
         # self.winning_nodes[2] = hypergame_sol.winning_nodes[2]
@@ -515,7 +698,7 @@ class DASWinReach:
 
         # Compute value of deception.
         try:
-            self.vod = len(self.winning_nodes[1]) / (len(self.base_game_sol.winning_nodes[2]) - len(self.final))
+            self.vod = int(np.count_nonzero(self.win_mask[1])) / (int(np.count_nonzero(self.base_game_sol.win_mask[2])) - len(self.final))
         except ZeroDivisionError:
             self.vod = 0.0
 
@@ -524,56 +707,130 @@ class DASWinReach:
         # Mark the game as solved
         self._is_solved = True
 
+    def solve_direct(self, sr_acts):
+        """
+        Computes P1's DASWin region on the base game graph, without constructing the hypergame.
+
+        The hypergame of `construct_hypergame` is evaluated over masks of the base game: P1's states in the hypergame
+        choose SR actions, the intermediate P2 states are nature states that follow SR actions, and decoys are targets.
+        A choice `(u, a)` of the hypergame is the set of steps `u --a--> v` of SR action `a`, and its support is
+            * `qF` if `v` is a decoy, `sink` if `v` is final,
+            * otherwise, the states `u'` reached by the SR out-edges of `v`, with decoys as `qF` and final states as
+                `sink`. Spurious transitions (see `construct_hypergame`) are dropped, and so are the steps without
+                a remaining transition.
+        The nested fixpoint of `mdp.ASWinReach.solve_attr` is then evaluated by counting, for every intermediate
+        state and every choice, the transitions into X and out of Y.
+
+        :return: (np.ndarray) Boolean mask of P1's DASWin region over the dense node ids of the base game graph.
+        """
+        index = graphutils.graph_index(self.graph)
+        src, dst = index.src, index.dst
+        is_final = index.mask(self.final)
+        is_decoy = index.mask(self.traps | self.fakes)
+        is_sr = index.action_mask(sr_acts)
+        is_state = index.mask(self.base_game_sol.winning_nodes[2]) & (index.turn == 1) & ~is_final & ~is_decoy
+
+        # Second hops: SR out-edges of intermediate states into states of hypergame, decoys or final P1 states.
+        is_hop = is_sr & (is_state[dst] | ((is_decoy[dst] | is_final[dst]) & (index.turn[dst] != 2)))
+        has_hop = np.bincount(src[is_hop], minlength=index.num_nodes) > 0
+        is_mid = np.zeros(index.num_nodes, dtype=bool)
+        is_mid[dst[is_sr & is_state[src] & ~is_decoy[dst] & ~is_final[dst]]] = True
+        num_spurious = np.count_nonzero(is_sr & is_mid[src] & ~is_hop)
+        if num_spurious > 0:
+            logger.warning(f"Dropped {num_spurious} spurious SR transitions that do not lead to a state of hypergame.")
+
+        # Steps of SR actions of hypergame states. Steps whose intermediate state is undecided, i.e.,
+        #   neither a decoy nor final, are kept only if the intermediate state has a hop.
+        mid = dst
+        is_step = is_sr & is_state[src] & (is_decoy[mid] | is_final[mid] | has_hop[mid])
+        is_undecided = is_step & ~is_decoy[mid] & ~is_final[mid]
+        choice, choice_state = index.choice, index.choice_state
+        num_choices = len(choice_state)
+
+        # Outer greatest fixpoint over Y, inner least fixpoint over X. Decoys are in X and Y, final states in neither.
+        set_y = is_state | is_decoy
+        iteration = 0
+        while True:
+            has_exit = np.bincount(src[is_hop & ~set_y[dst]], minlength=index.num_nodes) > 0
+            is_bad_step = is_step & ~is_decoy[mid] & (is_final[mid] | (is_undecided & has_exit[mid]))
+            is_safe = np.bincount(choice[is_bad_step], minlength=num_choices) == 0
+
+            set_x = is_decoy.copy()
+            while True:
+                has_hit = np.bincount(src[is_hop & set_x[dst]], minlength=index.num_nodes) > 0
+                is_hit_step = is_step & (is_decoy[mid] | (is_undecided & has_hit[mid]))
+                is_hit = np.bincount(choice[is_hit_step], minlength=num_choices) > 0
+                new = choice_state[is_hit & is_safe]
+                new = new[~set_x[new]]
+                iteration += 1
+                self._budget.step(iteration, len(np.unique(new)))
+                if len(new) == 0:
+                    break
+                set_x[new] = True
+
+            if np.array_equal(set_x, set_y):
+                break
+            set_y = set_x
+
+        # Decoys are in the winning region. Add P2 states as in `invert_projection`.
+        return self._add_p2_states(set_y, is_sr)
+
     def invert_projection(self, hypergame_sol, sr_acts):
-        # Get size of winning region
+        """
+        Maps the winning region of the hypergame back to the base game.
+
+        :return: (np.ndarray) Boolean mask of P1's DASWin region over the dense node ids of the base game graph.
+        """
+        # Get winning region
         daswin = hypergame_sol.winning_nodes[1]
 
         # Replace qF with all decoy states.
         # `sink` will never be in DASWin, so we don't care about it.
         # `p1win` will never be in DASWin, so we don't care about it.
-        daswin -= {"qF"}
-        daswin |= self.fakes | self.traps
+        index = graphutils.graph_index(self.graph)
+        is_daswin = index.mask((daswin - {"qF"}) | self.fakes | self.traps)
+        return self._add_p2_states(is_daswin, index.action_mask(sr_acts))
 
-        # Add every P2 state that has all subjectively rationalizable transitions leading into DASWin.
-        win2 = self.p2_game_sol.winning_nodes[2] - self.final
-        p2_states = (u for u in win2 if self.graph.nodes[u]["turn"] == 2)
-        for u in p2_states:
-            successors = (v for _, v, a in self.graph.out_edges(u, keys=True) if a in sr_acts[u])
-            if all(v in daswin for v in successors):
-                daswin.add(u)
+    def _add_p2_states(self, is_daswin, is_sr):
+        """ Adds every P2 state that has all subjectively rationalizable transitions leading into DASWin. """
+        index = graphutils.graph_index(self.graph)
+        is_p2 = self.p2_game_sol.win_mask[2] & ~index.mask(self.final) & (index.turn == 2)
+        has_exit = np.zeros(index.num_nodes, dtype=bool)
+        has_exit[index.src[is_sr & ~is_daswin[index.dst]]] = True
 
-        return daswin
+        return is_daswin | (is_p2 & ~has_exit)
 
 
-def solve_p2game(base_game_graph, final, fakes):
+def solve_p2game(base_game_graph, final, fakes, **kwargs):
     # p2game_model = p2_game(base_game_graph, traps, fakes)
     # p2game_graph = game.to_graph(p2game_model)
     # final = {st for st in p2game_graph.nodes() if "final" in p2game_graph.nodes[st]["label"]}
     if len(final | fakes) == 0:
         logger.warning("P2 game has no final states.")
 
-    p2game_solver = dtptb.SWinReach(base_game_graph, final=final | fakes, player=2)
+    p2game_solver = dtptb.SWinReach(base_game_graph, final=final | fakes, player=2, solver=dtptb.SWinReach.COUNTER, **kwargs)
     p2game_solver.solve()
-    logger.debug(
-        f"P2 game solved. "
-        f"\nFinal: {final}, Fakes: {fakes}"
-        f"\nWinning nodes P2: {p2game_solver.winning_nodes[2]}."
-        f"\nWinning nodes P1: {p2game_solver.winning_nodes[1]}."
+    logger.opt(lazy=True).debug(
+        "P2 game solved. \nFinal: {}, Fakes: {} \nWinning nodes P2: {}. \nWinning nodes P1: {}.",
+        lambda: final,
+        lambda: fakes,
+        lambda: p2game_solver.winning_nodes[2],
+        lambda: p2game_solver.winning_nodes[1]
     )
     return p2game_solver
 
 
-def solve_base_game(base_game_graph, final):
+def solve_base_game(base_game_graph, final, **kwargs):
     if len(final) == 0:
         logger.warning("Base game has no final states.")
 
-    base_game_solver = dtptb.SWinReach(base_game_graph, final=final, player=2)
+    base_game_solver = dtptb.SWinReach(base_game_graph, final=final, player=2, solver=dtptb.SWinReach.COUNTER, **kwargs)
     base_game_solver.solve()
-    logger.debug(
-        f"Base game solved. "
-        f"\nFinal: {final}."
-        f"\nWinning nodes P2: {base_game_solver.winning_nodes[2]}."
-        f"\nWinning nodes P1: {base_game_solver.winning_nodes[1]}."
+    logger.opt(lazy=True).debug(
+        "Base game solved. \nFinal: {}. \nWinning nodes P2: {}. \nWinning nodes P1: {}.",
+        lambda: final,
+        lambda: base_game_solver.winning_nodes[2],
+        lambda: base_game_solver.winning_nodes[1]
     )
     return base_game_solver
 
@@ -0,0 +1,186 @@
+"""
+Random games and MDPs, and the stored games of `exp2_randomgame`, for checks of the solvers against reference solves.
+"""
+
+import dtptb
+import game
+import glob
+import mdp
+import networkx as nx
+import os
+import random
+
+
+def random_mdp(seed, max_nodes=30, max_edges=90, actions="ab"):
+    """ Random qualitative MDP `(graph, final, rng)`. Edge keys are actions. """
+    rng = random.Random(seed)
+    num_nodes = rng.randint(1, max_nodes)
+    graph = nx.MultiDiGraph()
+    graph.add_nodes_from(range(num_nodes))
+    for _ in range(rng.randint(0, max_edges)):
+        graph.add_edge(rng.randrange(num_nodes), rng.randrange(num_nodes), key=rng.choice(actions))
+    final = set(rng.sample(range(num_nodes), rng.randint(0, min(3, num_nodes))))
+    return graph, final, rng
+
+
+def random_prob_mdp(seed, max_nodes=30, actions="abc"):
+    """ Random MDP `(graph, final, rng)` with edge attribute `probability`. Edge keys are actions. """
+    rng = random.Random(seed)
+    num_nodes = rng.randint(1, max_nodes)
+    graph = nx.MultiDiGraph()
+    graph.add_nodes_from(range(num_nodes))
+    for u in range(num_nodes):
+        for act in actions[:rng.randint(0, len(actions))]:
+            succ = {rng.randrange(num_nodes) for _ in range(rng.randint(1, 3))}
+            weights = [rng.random() for _ in succ]
+            for v, w in zip(succ, weights):
+                graph.add_edge(u, v, key=act, probability=w / sum(weights))
+    final = set(rng.sample(range(num_nodes), rng.randint(0, min(3, num_nodes))))
+    return graph, final, rng
+
+
+def reach_prob(graph, final, tol=1e-12, max_iter=20000):
+    """ Reference maximum reachability probabilities by plain value iteration over the edges of the graph. """
+    value = {u: 1.0 if u in final else 0.0 for u in graph.nodes()}
+    for _ in range(max_iter):
+        new = dict()
+        for u in graph.nodes():
+            if u in final:
+                new[u] = 1.0
+                continue
+            acts = dict()
+            for _, v, act, prob in graph.out_edges(u, keys=True, data="probability"):
+                acts[act] = acts.get(act, 0.0) + prob * value[v]
+            new[u] = max(acts.values(), default=0.0)
+        delta = max((abs(new[u] - value[u]) for u in graph.nodes()), default=0.0)
+        value = new
+        if delta < tol:
+            break
+    return value
+
+
+def random_model(seed, max_nodes=30, probabilistic=True, actions="abc"):
+    """ Random MDP model dictionary `(model, final)`, as returned by `game.Game.build_model`. """
+    rng = random.Random(seed)
+    num_nodes = rng.randint(1, max_nodes)
+    trans = dict()
+    for u in range(num_nodes):
+        trans[u] = dict()
+        for act in actions[:rng.randint(0, len(actions))]:
+            succ = {rng.randrange(num_nodes) for _ in range(rng.randint(1, 3))}
+            if probabilistic:
+                weights = [rng.random() for _ in succ]
+                trans[u][act] = {v: w / sum(weights) for v, w in zip(succ, weights)}
+            else:
+                trans[u][act] = succ
+    model = {
+        "type_game": game.TYPE_MDP if probabilistic else game.TYPE_QUALITATIVE_MDP,
+        "num_players": 1,
+        "type_transitions": game.TRANS_PROBABILISTIC if probabilistic else game.TRANS_NON_DETERMINISTIC,
+        "states": {u: ("s", u) for u in range(num_nodes)},
+        "transitions": trans,
+        "actions": set(actions),
+        "num_transitions": sum(len(succ) for acts in trans.values() for succ in acts.values()),
+        "init_states": [0],
+    }
+    final = set(rng.sample(range(num_nodes), rng.randint(0, min(3, num_nodes))))
+    return model, final
+
+
+def random_game(seed, max_nodes=30, max_edges=90, actions="abc"):
+    """ Random turn-based game `(graph, final, rng)` with turns 1 and 2 and at least one final state. """
+    rng = random.Random(seed)
+    num_nodes = rng.randint(2, max_nodes)
+    graph = nx.MultiDiGraph()
+    graph.add_nodes_from((u, {"turn": rng.choice([1, 2])}) for u in range(num_nodes))
+    for _ in range(rng.randint(0, max_edges)):
+        graph.add_edge(rng.randrange(num_nodes), rng.randrange(num_nodes), key=rng.choice(actions))
+    final = set(rng.sample(range(num_nodes), rng.randint(1, min(3, num_nodes))))
+    return graph, final, rng
+
+
+def solve_asw(model, final, **kwargs):
+    """ Solved `mdp.ASWinReach`. """
+    sol = mdp.ASWinReach(model, final, **kwargs)
+    sol.solve()
+    return sol
+
+
+def asw_solution(sol):
+    """ Comparable view of a solved `mdp.ASWinReach`. """
+    return {p: set(nodes) for p, nodes in sol.winning_nodes.items()}, sol.winning_edges
+
+
+def assert_same_asw(sol, model, final):
+    """ Asserts that a solved `mdp.ASWinReach` equals a fresh solve with the default backend. Returns the fresh solution. """
+    ref = solve_asw(model, final)
+    assert asw_solution(sol) == asw_solution(ref)
+    return ref
+
+
+def random_subset(rng, nodes, k):
+    """ Random subset of at most `k` of the given nodes. """
+    nodes = list(nodes)
+    return set(rng.sample(nodes, rng.randint(0, min(k, len(nodes)))))
+
+
+def random_alternating_game(seed, max_nodes=30, max_actions=3, actions="abc"):
+    """
+    Random game `(graph, final, rng)` with strictly alternating turns: even nodes are P1 states, odd nodes are
+    P2 states. Every action of a state leads to a single successor of the other player.
+    """
+    rng = random.Random(seed)
+    num_nodes = rng.randint(2, max_nodes)
+    graph = nx.MultiDiGraph()
+    graph.add_nodes_from((u, {"turn": 1 + u % 2, "label": set()}) for u in range(num_nodes))
+    for u in range(num_nodes):
+        others = range(1 - u % 2, num_nodes, 2)
+        for act in rng.sample(actions, rng.randint(0, max_actions)):
+            graph.add_edge(u, rng.choice(others), key=act)
+    final = set(rng.sample(range(num_nodes), rng.randint(1, min(3, num_nodes))))
+    return graph, final, rng
+
+
+def exp2_games(count):
+    """ The first `count` stored games `(name, graph, final)` of `exp2_randomgame/out`. Final states are labeled `goal`. """
+    root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "exp2_randomgame", "out")
+    games = []
+    for fpath in sorted(glob.glob(os.path.join(root, "*.model")))[:count]:
+        graph = game.to_graph(game.load_model(fpath))
+        final = {u for u in graph.nodes() if "goal" in graph.nodes[u]["label"]}
+        games.append((os.path.basename(fpath), graph, final))
+    return games
+
+
+def solve_swin(graph, final, player=1, **kwargs):
+    """ Solved `dtptb.SWinReach`. """
+    sol = dtptb.SWinReach(graph, final, player=player, **kwargs)
+    sol.solve()
+    return sol
+
+
+def swin_solution(sol):
+    """ Comparable view of a solved `dtptb.SWinReach`. """
+    return (
+        {k: set(nodes) for k, nodes in sol.level_set.items()},
+        {p: set(nodes) for p, nodes in sol.winning_nodes.items()},
+        {p: set(edges) for p, edges in sol.winning_edges.items()},
+    )
+
+
+def assert_same_swin(sol, graph, final, player=1):
+    """ Asserts that a solved `dtptb.SWinReach` equals a fresh `ggsolver` solve. Returns the fresh solution. """
+    ref = solve_swin(graph, final, player)
+    assert swin_solution(sol) == swin_solution(ref)
+    return ref
+
+
+def allowed_reference(graph, final, win):
+    """ Map of states to the actions whose successors all lie in the almost-sure winning region `win`. """
+    allowed = {u: set() for u in graph.nodes()}
+    for u in win - set(final):
+        succ = dict()
+        for _, v, act in graph.out_edges(u, keys=True):
+            succ.setdefault(act, set()).add(v)
+        allowed[u] = {act for act, vs in succ.items() if vs <= win}
+    return allowed
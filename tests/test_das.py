@@ -0,0 +1,94 @@
+import networkx as nx
+import pytest
+import random
+import solvers
+from loguru import logger
+from randgames import random_game, random_alternating_game, random_subset, exp2_games
+
+logger.remove()
+
+
+def nested_scan_hypergame(das, sr_acts):
+    """
+    Hypergame built by scanning the out-edges of every hypergame state, as `DASWinReach.construct_hypergame` did
+    before the two-step transitions were indexed. Only the first out-edge of every SR action is used.
+    """
+    decoys = das.traps | das.fakes
+    hgame = nx.MultiDiGraph()
+    hgame.add_nodes_from(
+        u for u in das.base_game_sol.winning_nodes[2]
+        if u not in das.final | decoys and das.graph.nodes[u]["turn"] == 1
+    )
+    hgame.add_nodes_from(["qF", "sink", "p1win"])
+    for u in list(hgame.nodes()):
+        if u in ("qF", "sink", "p1win"):
+            continue
+        for a in sr_acts[u]:
+            v = next(v for _, v, a_ in das.graph.out_edges(u, keys=True) if a_ == a)
+            if v in decoys:
+                hgame.add_edge(u, "qF", key=a)
+            elif v in das.final:
+                hgame.add_edge(u, "sink", key=a)
+            else:
+                for u_prime in {v_ for _, v_, a_ in das.graph.out_edges(v, keys=True) if a_ in sr_acts[v]}:
+                    if u_prime not in hgame.nodes() and u_prime not in das.final | decoys:
+                        continue
+                    if das.graph.nodes[u_prime]["turn"] == 2:
+                        continue
+                    if u_prime in decoys:
+                        hgame.add_edge(u, "qF", key=a)
+                    elif u_prime in das.final:
+                        hgame.add_edge(u, "sink", key=a)
+                    else:
+                        hgame.add_edge(u, u_prime, key=a)
+    for u in ("qF", "sink", "p1win"):
+        hgame.add_edge(u, u, key="*")
+    return hgame
+
+
+def assert_same_hypergame(graph, final, traps, fakes):
+    das = solvers.DASWinReach(graph, final, traps, fakes, solver=solvers.DASWinReach.SOLV_PROJECTION)
+    das.solve()
+    expected = nested_scan_hypergame(das, das.sr_acts)
+    assert set(das.hypergame.nodes()) == set(expected.nodes())
+    assert set(das.hypergame.edges(keys=True)) == set(expected.edges(keys=True))
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_hypergame_matches_nested_scan(seed):
+    graph, final, rng = random_alternating_game(seed)
+    nodes = set(graph.nodes()) - final
+    assert_same_hypergame(graph, final, random_subset(rng, nodes, 2), random_subset(rng, nodes, 2))
+
+
+@pytest.mark.parametrize("name, graph, final", exp2_games(6))
+def test_hypergame_matches_nested_scan_on_exp2(name, graph, final):
+    nodes = sorted(set(graph.nodes()) - final, key=str)
+    for k in range(3):
+        rng = random.Random(k)
+        assert_same_hypergame(graph, final, set(rng.sample(nodes, 1)), set(rng.sample(nodes, 2)))
+
+
+def assert_direct_matches_projection(graph, final, traps, fakes):
+    proj = solvers.DASWinReach(graph, final, traps, fakes, solver=solvers.DASWinReach.SOLV_PROJECTION)
+    proj.solve()
+    direct = solvers.DASWinReach(graph, final, traps, fakes, solver=solvers.DASWinReach.SOLV_DIRECT)
+    direct.solve()
+    assert direct.vod == proj.vod
+    assert direct.winning_nodes == proj.winning_nodes
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_direct_matches_projection(seed):
+    graph, final, rng = random_game(seed, max_nodes=25, max_edges=70)
+    nodes = set(graph.nodes()) - final
+    assert_direct_matches_projection(graph, final, random_subset(rng, nodes, 3), random_subset(rng, nodes, 3))
+
+
+@pytest.mark.parametrize("name, graph, final", exp2_games(20))
+def test_direct_matches_projection_on_exp2(name, graph, final):
+    nodes = sorted(set(graph.nodes()) - final, key=str)
+    for k in range(5):
+        rng = random.Random(k)
+        traps, fakes = set(rng.sample(nodes, k % 3)), set(rng.sample(nodes, 1 + k % 2))
+        assert_direct_matches_projection(graph, final, traps, fakes)
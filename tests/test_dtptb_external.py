@@ -0,0 +1,42 @@
+import dtptb
+import os
+import pytest
+import stat
+from dtptb import external
+from loguru import logger
+from randgames import random_game, solve_swin, assert_same_swin
+
+logger.remove()
+
+
+@pytest.fixture
+def broken_dtptb_reach(tmp_path, monkeypatch):
+    """ A `dtptb-reach` executable on PATH that fails on any input. """
+    fpath = tmp_path / "dtptb-reach"
+    fpath.write_text("#!/bin/sh\necho 'unsupported format' >&2\nexit 1\n")
+    fpath.chmod(fpath.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ.get('PATH', '')}")
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_dtptb_reach_ignores_executable_on_path(broken_dtptb_reach, seed):
+    graph, final, _ = random_game(seed)
+    assert_same_swin(solve_swin(graph, final, solver=dtptb.SWinReach.DTPTB_REACH), graph, final)
+
+
+def test_dtptb_reach_requires_format_with_command():
+    graph, final, _ = random_game(0)
+    sol = dtptb.SWinReach(graph, final, solver=dtptb.SWinReach.DTPTB_REACH, command=["dtptb-reach"])
+    with pytest.raises(ValueError):
+        sol.solve()
+
+
+@pytest.mark.parametrize("binary", [True, False])
+@pytest.mark.parametrize("seed", range(10))
+def test_standin_matches_ggsolver(binary, seed):
+    graph, final, _ = random_game(seed)
+    for player in (1, 2):
+        sol = solve_swin(
+            graph, final, player, solver=dtptb.SWinReach.DTPTB_REACH, command=external.STANDIN_COMMAND, binary=binary
+        )
+        assert_same_swin(sol, graph, final, player)
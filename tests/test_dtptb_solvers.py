@@ -0,0 +1,128 @@
+import dtptb
+import multiprocessing
+import os
+import pytest
+from loguru import logger
+from randgames import random_game, random_alternating_game, random_subset, solve_swin, assert_same_swin
+
+logger.remove()
+
+
+ATTRACTOR_WORKER = dtptb.solvers._attractor_worker
+
+
+def dying_worker(conn, is_player, counter, is_won, dst, src, offset):
+    """ Worker of `solve_distributed` that dies without answering if it owns the first block. """
+    if offset == 0:
+        os._exit(1)
+    ATTRACTOR_WORKER(conn, is_player, counter, is_won, dst, src, offset)
+
+
+@pytest.mark.parametrize("solver", [dtptb.SWinReach.COUNTER, dtptb.SWinReach.SPARSE])
+@pytest.mark.parametrize("seed", range(50))
+def test_backend_matches_ggsolver(solver, seed):
+    graph, final, _ = random_game(seed)
+    for player in (1, 2):
+        assert_same_swin(solve_swin(graph, final, player, solver=solver), graph, final, player)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_distributed_matches_ggsolver(seed):
+    graph, final, _ = random_game(seed)
+    for player in (1, 2):
+        sol = solve_swin(graph, final, player, solver=dtptb.SWinReach.DISTRIBUTED, n_workers=2)
+        assert_same_swin(sol, graph, final, player)
+
+
+def test_distributed_stops_workers_after_worker_died(monkeypatch):
+    graph, final, _ = random_game(1)
+    monkeypatch.setattr(dtptb.solvers, "_attractor_worker", dying_worker)
+    sol = dtptb.SWinReach(graph, final, solver=dtptb.SWinReach.DISTRIBUTED, n_workers=2)
+    with pytest.raises((EOFError, OSError)):
+        sol.solve()
+    assert multiprocessing.active_children() == []
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_rank_and_masks_match_level_sets(seed):
+    graph, final, _ = random_game(seed)
+    for player in (1, 2):
+        sol = solve_swin(graph, final, player)
+        index = sol.index
+        level = {u: k for k, nodes in sol.level_set.items() for u in nodes}
+        for u in graph.nodes():
+            uid = index.node_id[u]
+            assert sol.rank[uid] == level.get(u, dtptb.SWinReach.RANK_INF)
+            assert sol.win_mask[player][uid] == (u in level)
+            assert sol.win_mask[3 - player][uid] == (u not in level)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_solve_batch_matches_single_solves(seed):
+    graph, _, rng = random_game(seed)
+    finals = [random_subset(rng, graph.nodes(), 4) for _ in range(rng.choice([1, 3, 64, 70]))]
+    for player in (1, 2):
+        for final, sol in zip(finals, dtptb.solve_batch(graph, finals, player=player)):
+            assert_same_swin(sol, graph, final, player)
+
+
+@pytest.mark.parametrize("solver", [dtptb.SWinReach.GGSOLVER, dtptb.SWinReach.COUNTER])
+@pytest.mark.parametrize("seed", range(30))
+def test_add_targets_matches_fresh_solve(solver, seed):
+    graph, final, rng = random_game(seed)
+    for player in (1, 2):
+        sol = solve_swin(graph, final, player, solver=solver)
+        targets = set(final)
+        for _ in range(3):
+            new = random_subset(rng, graph.nodes(), 3)
+            sol.add_targets(new)
+            targets |= new
+            ref = assert_same_swin(sol, graph, targets, player)
+            assert (sol.rank == ref.rank).all()
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_edge_removal_matches_fresh_solve(seed):
+    graph, final, rng = random_game(seed)
+    for player in (1, 2):
+        sol = solve_swin(graph, final, player, solver=dtptb.SWinReach.COUNTER)
+        pruned = graph.copy()
+        for _ in range(4):
+            if rng.random() < 0.6:
+                edges = list(pruned.edges(keys=True))
+                removed = rng.sample(edges, min(len(edges), rng.randint(0, 4)))
+                sol.remove_edges(removed)
+            else:
+                absorbing = random_subset(rng, graph.nodes(), 3)
+                sol.make_absorbing(absorbing)
+                removed = [e for u in absorbing for e in pruned.out_edges(u, keys=True)]
+            pruned.remove_edges_from(removed)
+            assert_same_swin(sol, pruned, final, player)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_is_winning_matches_solve(seed):
+    graph, final, rng = random_game(seed)
+    for player in (1, 2):
+        ref = solve_swin(graph, final, player)
+        query = dtptb.SWinReach(graph, final, player=player)
+        for u in rng.sample(list(graph.nodes()), graph.number_of_nodes()):
+            for p in (1, 2):
+                assert query.is_winning(u, p) == (u in ref.winning_nodes[p])
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_strategy_decreases_rank(seed):
+    graph, final, _ = random_alternating_game(seed)
+    for player in (1, 2):
+        sol = solve_swin(graph, final, player)
+        index = sol.index
+        for u in graph.nodes():
+            act = sol.action(u)
+            uid = index.node_id[u]
+            is_choice = sol.win_mask[player][uid] and u not in final and graph.nodes[u]["turn"] == player
+            assert (act is not None) == is_choice
+            if act is not None:
+                succ = [v for _, v, a in graph.out_edges(u, keys=True) if a == act]
+                assert len(succ) > 0
+                assert all(sol.rank[index.node_id[v]] < sol.rank[uid] for v in succ)
@@ -0,0 +1,65 @@
+import graphutils
+import networkx as nx
+import numpy as np
+import pytest
+from randgames import random_game, random_subset
+
+
+def edge_set(index):
+    """ Edges of an index as `(u, v, key)` triples. """
+    return {(index.nodes[s], index.nodes[d], k) for s, d, k in zip(index.src, index.dst, index.keys)}
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_invalidate_index_after_rewiring(seed):
+    graph, _, rng = random_game(seed, max_edges=60)
+    if graph.number_of_edges() == 0:
+        graph.add_edge(0, 1, key="a")
+    stale = graphutils.graph_index(graph)
+
+    # Rewire an edge and flip a turn: node and edge counts stay the same.
+    u, v, key = next(iter(graph.edges(keys=True)))
+    graph.remove_edge(u, v, key)
+    graph.add_edge(v, u, key=key + "'")
+    graph.nodes[u]["turn"] = 3 - graph.nodes[u]["turn"]
+    graphutils.invalidate_index(graph)
+
+    index = graphutils.graph_index(graph)
+    assert index is not stale
+    assert edge_set(index) == set(graph.edges(keys=True))
+    assert index.turn[index.node_id[u]] == graph.nodes[u]["turn"]
+
+
+def test_resized_graph_is_reindexed():
+    graph = nx.MultiDiGraph()
+    graph.add_edge(0, 1, key="a")
+    stale = graphutils.graph_index(graph)
+    graph.add_edge(1, 0, key="a")
+    index = graphutils.graph_index(graph)
+    assert index is not stale
+    assert edge_set(index) == set(graph.edges(keys=True))
+
+
+def test_frozen_graph_is_not_cached():
+    graph = nx.MultiDiGraph()
+    graph.add_edge(0, 1, key="a")
+    nx.freeze(graph)
+    graphutils.graph_index(graph)
+    assert graphutils.INDEX_KEY not in graph.graph
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_scc_matches_networkx(seed):
+    graph, _, rng = random_game(seed)
+    index = graphutils.graph_index(graph)
+    scc = index.scc
+    comps = {frozenset(index.nodes[i] for i in np.flatnonzero(scc.comp == c).tolist()) for c in range(scc.num_comps)}
+    assert comps == {frozenset(c) for c in nx.strongly_connected_components(graph)}
+
+    # Every edge of the condensation DAG goes from a higher to a lower component id.
+    for c in range(scc.num_comps):
+        assert all(d < c for d in scc.dag_succ[scc.dag_ptr[c]:scc.dag_ptr[c + 1]].tolist())
+
+    targets = random_subset(rng, graph.nodes(), 3)
+    expected = set(targets).union(*(nx.ancestors(graph, u) for u in targets))
+    assert index.nodes_of(scc.coreachable(index.mask(targets))) == expected
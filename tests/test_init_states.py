@@ -0,0 +1,65 @@
+import graphutils
+import networkx as nx
+import pytest
+import solvers
+from loguru import logger
+from randgames import random_alternating_game, random_subset
+
+logger.remove()
+
+
+def reachable_subgraph(graph, init_states):
+    """ Subgraph of the states reachable from `init_states`, computed with networkx. """
+    reachable = set(init_states).union(*(nx.descendants(graph, u) for u in init_states))
+    return graph.subgraph(reachable).copy()
+
+
+def random_instance(seed):
+    """ Random alternating game with initial states and decoys `(graph, final, init_states, traps, fakes, rng)`. """
+    graph, final, rng = random_alternating_game(seed)
+    nodes = set(graph.nodes()) - final
+    init_states = random_subset(rng, graph.nodes(), 2) or {0}
+    return graph, final, init_states, random_subset(rng, nodes, 2), random_subset(rng, nodes, 2), rng
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_restrict_keeps_reachable_subgraph(seed):
+    graph, _, init_states, _, _, _ = random_instance(seed)
+    expected = reachable_subgraph(graph, init_states)
+    pruned = graphutils.restrict(graph, init_states)
+    assert set(pruned.nodes()) == set(expected.nodes())
+    assert set(pruned.edges(keys=True)) == set(expected.edges(keys=True))
+    assert dict(pruned.nodes(data="turn")) == dict(expected.nodes(data="turn"))
+
+
+@pytest.mark.parametrize("solver", [solvers.DSWinReach, solvers.DASWinReach])
+@pytest.mark.parametrize("seed", range(50))
+def test_init_states_match_solve_on_reachable_subgraph(solver, seed):
+    graph, final, init_states, traps, fakes, _ = random_instance(seed)
+    sol = solver(graph, final, traps, fakes, init_states=init_states)
+    sol.solve()
+
+    sub = reachable_subgraph(graph, init_states)
+    ref = solver(sub, final & set(sub), traps & set(sub), fakes & set(sub))
+    ref.solve()
+    assert sol.vod == ref.vod
+    assert sol.winning_nodes == ref.winning_nodes
+
+
+@pytest.mark.parametrize("n_traps, n_fakes", [(0, 1), (1, 0)])
+@pytest.mark.parametrize("sol_concept", [solvers.DecoyAllocator.SWin, solvers.DecoyAllocator.ASWin])
+@pytest.mark.parametrize("seed", range(20))
+def test_decoy_allocation_with_init_states_matches_reachable_subgraph(n_traps, n_fakes, sol_concept, seed):
+    graph, final, init_states, _, _, rng = random_instance(seed)
+    candidates = {c: random_subset(rng, set(graph.nodes()) - final, 2) for c in range(4)}
+    alloc = solvers.DecoyAllocator(
+        graph, final, n_traps, n_fakes, candidates, sol_concept=sol_concept, init_states=init_states
+    )
+    alloc.solve()
+
+    sub = reachable_subgraph(graph, init_states)
+    sub_candidates = {c: nodes & set(sub) for c, nodes in candidates.items() if len(nodes & set(sub)) > 0}
+    ref = solvers.DecoyAllocator(sub, final & set(sub), n_traps, n_fakes, sub_candidates, sol_concept=sol_concept)
+    ref.solve()
+    assert alloc.best_decoys() == ref.best_decoys()
+    assert alloc.data() == ref.data()
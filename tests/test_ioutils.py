@@ -0,0 +1,37 @@
+import ioutils
+import numpy as np
+import pytest
+from loguru import logger
+from randgames import random_game, random_mdp, solve_asw, solve_swin
+
+logger.remove()
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+@pytest.mark.parametrize("seed", range(5))
+def test_solution_round_trip(tmp_path, mmap, seed):
+    graph, final, _ = random_game(seed)
+    sol = solve_swin(graph, final, player=2)
+    ioutils.save_solution(tmp_path, sol)
+    loaded = ioutils.load_solution(tmp_path, mmap=mmap)
+    assert isinstance(loaded["rank"], np.memmap) == mmap
+    assert isinstance(loaded["strategy"], np.memmap) == mmap
+    assert np.array_equal(loaded["rank"], sol.rank)
+    assert np.array_equal(loaded["strategy"], sol.strategy)
+    assert loaded["player"] == 2
+    assert loaded["nodes"] == list(sol.index.nodes)
+    assert loaded["actions"] == list(sol.index.actions)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+@pytest.mark.parametrize("seed", range(5))
+def test_allowed_actions_round_trip(tmp_path, mmap, seed):
+    graph, final, _ = random_mdp(seed, actions=[f"a{i}" for i in range(70)])
+    sol = solve_asw(graph, final)
+    ioutils.save_allowed_actions(tmp_path, sol)
+    loaded = ioutils.load_allowed_actions(tmp_path, mmap=mmap)
+    assert isinstance(loaded["allowed"], np.memmap) == mmap
+    assert np.array_equal(loaded["allowed"], sol.allowed)
+    assert loaded["player"] == 1
+    assert loaded["nodes"] == list(sol.index.nodes)
+    assert loaded["actions"] == list(sol.index.actions)
@@ -0,0 +1,46 @@
+import mdp
+import pytest
+from loguru import logger
+from randgames import random_mdp, random_subset, solve_asw, assert_same_asw
+
+logger.remove()
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_warm_start_matches_fresh_solve(seed):
+    graph, final, rng = random_mdp(seed)
+    new = random_subset(rng, graph.nodes(), 3)
+    warm = solve_asw(graph, final)
+    assert_same_asw(solve_asw(graph, final | new, warm_start=warm), graph, final | new)
+
+
+def test_warm_start_rejects_other_model():
+    graph1, final1, _ = random_mdp(1)
+    graph2 = graph1.copy()
+    warm = solve_asw(graph1, final1)
+    with pytest.raises(ValueError):
+        mdp.ASWinReach(graph2, final1, warm_start=warm)
+
+
+def test_warm_start_rejects_fewer_final_states():
+    graph, final, _ = random_mdp(3)
+    warm = solve_asw(graph, final | {0})
+    with pytest.raises(ValueError):
+        mdp.ASWinReach(graph, final - {0}, warm_start=warm)
+
+
+def test_warm_start_rejects_unsolved():
+    graph, final, _ = random_mdp(5)
+    with pytest.raises(ValueError):
+        mdp.ASWinReach(graph, final, warm_start=mdp.ASWinReach(graph, final))
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_add_targets_matches_fresh_solve(seed):
+    graph, final, rng = random_mdp(seed)
+    sol = solve_asw(graph, final, solver=rng.choice([mdp.ASWinReach.SOLV_POMC, mdp.ASWinReach.SOLV_COUNTER]))
+    for _ in range(3):
+        new = random_subset(rng, graph.nodes(), 3)
+        sol.add_targets(new)
+        final |= new
+        assert_same_asw(sol, graph, final)
@@ -0,0 +1,95 @@
+import game
+import graphutils
+import mdp
+import numpy as np
+import pytest
+from loguru import logger
+from randgames import allowed_reference, random_mdp, random_model, random_prob_mdp, random_subset, reach_prob, solve_asw, assert_same_asw
+
+logger.remove()
+
+
+@pytest.mark.parametrize("solver", [mdp.ASWinReach.SOLV_COUNTER, mdp.ASWinReach.SOLV_MEC, mdp.ASWinReach.SOLV_ATTR])
+@pytest.mark.parametrize("seed", range(50))
+def test_backend_matches_pomc(solver, seed):
+    graph, final, _ = random_mdp(seed)
+    assert_same_asw(solve_asw(graph, final, solver=solver), graph, final)
+
+
+@pytest.mark.parametrize("method", [
+    mdp.MaxReachProb.METHOD_JACOBI, mdp.MaxReachProb.METHOD_GAUSS_SEIDEL, mdp.MaxReachProb.METHOD_TOPOLOGICAL
+])
+@pytest.mark.parametrize("seed", range(30))
+def test_max_reach_prob_matches_value_iteration(method, seed):
+    graph, final, _ = random_prob_mdp(seed)
+    ref = reach_prob(graph, final)
+    for precompute in (True, False):
+        sol = mdp.MaxReachProb(graph, final, method=method, precompute=precompute, tol=1e-10)
+        sol.solve()
+        assert all(abs(sol.values[u] - ref[u]) < 1e-5 for u in graph.nodes())
+
+        # Probability 0 is always found before iteration, probability 1 only with precomputation.
+        index = sol.index
+        assert index.nodes_of(sol.prob0) == {u for u in graph.nodes() if ref[u] < 1e-9}
+        prob1 = {u for u in graph.nodes() if ref[u] > 1 - 1e-9} if precompute else final
+        assert index.nodes_of(sol.prob1) == prob1
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_solve_batch_matches_single_solves(seed):
+    graph, _, rng = random_mdp(seed)
+    finals = [random_subset(rng, graph.nodes(), 3) for _ in range(rng.choice([1, 5, 70]))]
+    for final, sol in zip(finals, mdp.solve_batch(graph, finals)):
+        assert_same_asw(sol, graph, final)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_model_dict_matches_graph(seed):
+    model, final = random_model(seed, probabilistic=seed % 2 == 0)
+    graph = game.to_graph(model)
+    for solver in (mdp.ASWinReach.SOLV_COUNTER, mdp.ASWinReach.SOLV_MEC, mdp.ASWinReach.SOLV_ATTR):
+        for m in (model, graphutils.graph_index(model)):
+            assert_same_asw(solve_asw(m, final, solver=solver), graph, final)
+    for sol in mdp.solve_batch(model, [final]):
+        assert_same_asw(sol, graph, final)
+
+
+@pytest.mark.parametrize("seed", range(0, 30, 2))
+def test_max_reach_prob_on_model_dict(seed):
+    model, final = random_model(seed)
+    ref = reach_prob(game.to_graph(model), final)
+    sol = mdp.MaxReachProb(model, final, method=mdp.MaxReachProb.METHOD_TOPOLOGICAL, tol=1e-10)
+    sol.solve()
+    assert all(abs(sol.values[u] - ref[u]) < 1e-5 for u in ref)
+
+
+def test_pomc_rejects_model_dict():
+    model, final = random_model(0)
+    for m in (model, graphutils.graph_index(model)):
+        with pytest.raises(ValueError):
+            mdp.ASWinReach(m, final, solver=mdp.ASWinReach.SOLV_POMC).solve()
+
+
+@pytest.mark.parametrize("solver", [mdp.ASWinReach.SOLV_POMC, mdp.ASWinReach.SOLV_COUNTER])
+@pytest.mark.parametrize("seed", range(30))
+def test_allowed_matches_reference(solver, seed):
+    # Odd seeds use more than 64 actions, so that the bitmask spans two words.
+    graph, final, _ = random_mdp(seed, actions=[f"a{i}" for i in range(70)] if seed % 2 else "ab")
+    sol = solve_asw(graph, final, solver=solver)
+    ref = allowed_reference(graph, final, sol.winning_nodes[1])
+    index = sol.index
+    for u in graph.nodes():
+        assert sol.allowed_actions(u) == ref[u]
+        expected = np.zeros(sol.allowed.shape[1], dtype=np.uint64)
+        for c in (index.actions.index(a) for a in ref[u]):
+            expected[c // 64] |= np.uint64(1) << np.uint64(c % 64)
+        assert np.array_equal(sol.allowed[index.node_id[u]], expected)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_is_almost_sure_winning_matches_solve(seed):
+    graph, final, rng = random_mdp(seed)
+    ref = solve_asw(graph, final)
+    query = mdp.ASWinReach(graph, final)
+    for u in rng.sample(list(graph.nodes()), graph.number_of_nodes()):
+        assert query.is_almost_sure_winning(u) == (u in ref.winning_nodes[1])
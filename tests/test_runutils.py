@@ -0,0 +1,79 @@
+import dtptb
+import mdp
+import pytest
+import runutils
+import solvers
+from loguru import logger
+from randgames import random_game, random_alternating_game, random_mdp, random_prob_mdp, assert_same_swin, assert_same_asw
+
+logger.remove()
+
+
+# Random instances whose re-solve takes at least one level, so that the cancellation flag is checked.
+SEEDS = [18, 30, 39]
+
+
+class Switch:
+    """ Cancellation flag that can be turned on and off between solves. """
+    def __init__(self):
+        self.on = False
+
+    def __call__(self):
+        return self.on
+
+
+def cancel_resolve(sol, switch):
+    """ Solves `sol`, cancels a forced re-solve, and solves it again without `force`. """
+    sol.solve()
+    switch.on = True
+    with pytest.raises(runutils.SolveCancelled):
+        sol.solve(force=True)
+    switch.on = False
+    sol.solve()
+    return sol
+
+
+@pytest.mark.parametrize("solver", [
+    dtptb.SWinReach.GGSOLVER, dtptb.SWinReach.COUNTER, dtptb.SWinReach.SPARSE, dtptb.SWinReach.DISTRIBUTED
+])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_cancelled_resolve_leaves_game_unsolved(solver, seed):
+    graph, final, _ = random_game(seed, max_nodes=60, max_edges=150)
+    for player in (1, 2):
+        switch = Switch()
+        sol = dtptb.SWinReach(graph, final, player=player, solver=solver, n_workers=2, cancel=switch)
+        assert_same_swin(cancel_resolve(sol, switch), graph, final, player)
+
+
+@pytest.mark.parametrize("solver", [
+    mdp.ASWinReach.SOLV_POMC, mdp.ASWinReach.SOLV_COUNTER, mdp.ASWinReach.SOLV_MEC, mdp.ASWinReach.SOLV_ATTR
+])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_cancelled_resolve_leaves_mdp_unsolved(solver, seed):
+    graph, final, _ = random_mdp(seed, max_nodes=60, max_edges=150)
+    switch = Switch()
+    sol = cancel_resolve(mdp.ASWinReach(graph, final | {0}, solver=solver, cancel=switch), switch)
+    assert_same_asw(sol, graph, final | {0})
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_cancelled_resolve_leaves_values_unsolved(seed):
+    graph, final, _ = random_prob_mdp(seed, max_nodes=60)
+    switch = Switch()
+    sol = cancel_resolve(mdp.MaxReachProb(graph, final | {0}, precompute=False, cancel=switch), switch)
+    ref = mdp.MaxReachProb(graph, final | {0}, precompute=False)
+    ref.solve()
+    assert sol.values == ref.values
+
+
+@pytest.mark.parametrize("solver", [solvers.DSWinReach, solvers.DASWinReach])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_cancelled_resolve_leaves_deceptive_game_unsolved(solver, seed):
+    graph, final, rng = random_alternating_game(seed, max_nodes=60)
+    fakes = {rng.choice(sorted(set(graph.nodes()) - final))}
+    switch = Switch()
+    sol = cancel_resolve(solver(graph, final, set(), fakes, cancel=switch), switch)
+    ref = solver(graph, final, set(), fakes)
+    ref.solve()
+    assert sol.vod == ref.vod
+    assert sol.winning_nodes == ref.winning_nodes
@@ -0,0 +1,23 @@
+import networkx as nx
+import pytest
+from loguru import logger
+from randgames import random_game, solve_swin
+
+pytest.importorskip("pygraphviz")
+import vizutils  # noqa: E402
+
+logger.remove()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_rank_of_follows_solver_index(seed):
+    graph, final, _ = random_game(seed)
+
+    # The solver sees the nodes in a different order than `graph`.
+    reordered = nx.MultiDiGraph()
+    reordered.add_nodes_from(reversed(list(graph.nodes(data=True))))
+    reordered.add_edges_from(graph.edges(keys=True, data=True))
+    sol = solve_swin(reordered, final)
+
+    level = {u: k for k, nodes in sol.level_set.items() for u in nodes}
+    assert vizutils.rank_of(sol) == {u: level.get(u, "inf") for u in graph.nodes()}
@@ -1,3 +1,6 @@
+import dtptb
+import graphutils
+import numpy as np
 import pygraphviz
 
 
@@ -73,7 +76,7 @@ def visualize_game(
     :param traps: (set) Nodes marked as a trap.
     :param fakes: (set) Nodes marked as a fake target.
     :param final: (set) Nodes marked as a final state.
-    :param rank: (set) Rank of a node in the winning region.
+    :param rank: (dict) Map of nodes to their rank in the winning region, e.g., `rank_of(solver)`.
     :param winning_nodes: (set) Set of winning nodes.
     :param sr_acts: (set) Set of winning edges.
     :param winning_color: (Color) Color of winning nodes and edges.
@@ -128,17 +131,27 @@ def visualize_game(
     vis_graph.draw(fpath)
 
 
-def save_base_game(graph, solver, fpath, final=None, traps=None, fakes=None, sr_acts=None):
-    # Extract rank
-    rank = {state: level for level, states in solver.level_set.items() for state in states}
-    for state in solver.winning_nodes[1]:
-        rank[state] = float("inf")
+def rank_of(solver):
+    """
+    Map of nodes to the rank of a solver, e.g., `dtptb.SWinReach` or `DSWinReach`.
+
+    The `rank` array of a solver is indexed by the dense node ids of the graph it solved (`solver.index` or
+    the index of `solver.graph`), which may differ from the graph being visualized, e.g., when restricted to
+    the states reachable from initial states. Ranks of states that are not winning are shown as "inf".
+    """
+    index = solver.index if hasattr(solver, "index") else graphutils.graph_index(solver.graph)
+    return {
+        u: "inf" if r == dtptb.SWinReach.RANK_INF else r
+        for u, r in zip(index.nodes, np.asarray(solver.rank).tolist())
+    }
 
-    # Generate PNG and save.
+
+def save_base_game(graph, solver, fpath, final=None, traps=None, fakes=None, sr_acts=None):
+    # Generate PNG and save. Ranks are mapped to nodes through the graph of the solver.
     visualize_game(
         game_graph=graph,
         fpath=fpath,
-        rank=rank,
+        rank=rank_of(solver),
         final=final,
         traps=traps,
         fakes=fakes,
@@ -149,16 +162,11 @@ def save_base_game(graph, solver, fpath, final=None, traps=None, fakes=None, sr_
 
 
 def save_p2_game(graph, solver, fpath, final=None, traps=None, fakes=None, sr_acts=None):
-    # Extract rank
-    rank = {state: level for level, states in solver.level_set.items() for state in states}
-    for state in solver.winning_nodes[1]:
-        rank[state] = float("inf")
-
-    # Generate PNG and save.
+    # Generate PNG and save. Ranks are mapped to nodes through the graph of the solver.
     visualize_game(
         game_graph=graph,
         fpath=fpath,
-        rank=rank,
+        rank=rank_of(solver),
         final=final,
         traps=traps,
         fakes=fakes,
@@ -169,16 +177,11 @@ def save_p2_game(graph, solver, fpath, final=None, traps=None, fakes=None, sr_ac
 
 
 def save_hypergame(graph, solver, fpath, final=None, traps=None, fakes=None, sr_acts=None):
-    # Extract rank
-    rank = {state: level for level, states in solver.level_set.items() for state in states}
-    for state in solver.winning_nodes[2]:
-        rank[state] = float("inf")
-
-    # Generate PNG and save.
+    # Generate PNG and save. Ranks are mapped to nodes through the graph of the solver.
     visualize_game(
         game_graph=graph,
         fpath=fpath,
-        rank=rank,
+        rank=rank_of(solver),
         final=final,
         traps=traps,
         fakes=fakes,